@@ -1,46 +1,105 @@
 #!/usr/bin/env python3
-import os, json, time, random, threading
-from flask import Flask, request, jsonify, send_from_directory
+import os, sys, json, math, time, random, signal, socket, atexit, threading
+from flask import Flask, Response, g, request, jsonify, send_from_directory
 import requests
+from concurrent.futures import ThreadPoolExecutor
 
 BASE = os.path.dirname(__file__)
+from state import StateStore
 
 # ---------- JSON helpers ----------
 def jload(path, default):
     try:
         with open(path) as f: return json.load(f)
     except: return default
-def jsave(path, obj):
+def jsave(path, obj, indent=2):
+    """Atomic write: temp file + fsync + rename, so a power cut never leaves half a file."""
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w") as f: json.dump(obj, f, indent=2)
-
-# ---------- Configs ----------
-CFG            = jload(f"{BASE}/config/settings.json", {})
-AI_CLUSTERS    = jload(f"{BASE}/config/ai_clusters.json", {"clusters":[]})
-BAND_CLUSTERS  = jload(f"{BASE}/config/band_clusters.json", {"clusters":[], "solo_targets":[]})
-COLORS         = jload(f"{BASE}/config/custom_colors.json", {})
-WLED_FX        = jload(f"{BASE}/config/custom_wled_fx.json", {})
-PIXEL_FX       = jload(f"{BASE}/config/custom_pixel_fx.json", {})
-FIXTURES       = jload(f"{BASE}/config/fixtures_full.json", {"color_palettes":{},"groups":{}, "fixtures":{}})
-PRESETS        = jload(f"{BASE}/config/custom_presets.json", {"group_presets":{}, "band_targets":[], "apply_order":[]})
-
-STATE          = jload(f"{BASE}/data/state.json", {})
-REHEARSAL      = jload(f"{BASE}/data/rehearsal_positions.json", {})
-SCENES_PATH    = f"{BASE}/data/scenes.json"
-SCENES         = jload(SCENES_PATH, {})
-BAND_PRESETS_PATH = f"{BASE}/data/band_presets.json"
-BAND_PRESETS   = jload(BAND_PRESETS_PATH, {})  # { target: { fixture: {ch-values...} } }
+    data = json.dumps(obj, indent=indent, separators=None if indent else (",", ":"))
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(data); f.flush(); os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+# ---------- Configs (gevalideerd + hot reload, zie config_registry.py) ----------
+from config_registry import ConfigRegistry, ConfigError, check_clusters, check_fixtures, check_object
+
+def fixtures_build(d):
+    d = check_fixtures(d)
+    # tube DMX 'mode' → actieve kanaalmap
+    tube = d["fixtures"].get("tube_dmx")
+    if tube and "modes" in tube:
+        tube["ch"] = tube["modes"].get(tube.get("mode", "simple"), tube["modes"]["simple"])
+    return d
+
+def settings_build(d):
+    """settings.json plus top-level overrides from $LIGHTSHOW_SETTINGS (JSON), e.g. for the bench."""
+    return {**check_object(d), **json.loads(os.environ.get("LIGHTSHOW_SETTINGS") or "{}")}
+
+DATA           = os.environ.get("LIGHTSHOW_DATA") or f"{BASE}/data"   # state, scenes, rehearsal
+CONFIG         = ConfigRegistry(f"{BASE}/config")
+CFG            = CONFIG.register("settings", "settings.json", {}, settings_build)
+AI_CLUSTERS    = CONFIG.register("ai_clusters", "ai_clusters.json", {"clusters":[]}, check_clusters)
+BAND_CLUSTERS  = CONFIG.register("band_clusters", "band_clusters.json", {"clusters":[], "solo_targets":[]}, check_clusters)
+COLORS         = CONFIG.register("colors", "custom_colors.json", {}, check_object)
+WLED_FX        = CONFIG.register("wled_fx", "custom_wled_fx.json", {}, check_object)
+PIXEL_FX       = CONFIG.register("pixel_fx", "custom_pixel_fx.json", {}, check_object)
+FIXTURES       = CONFIG.register("fixtures", "fixtures_full.json", {"color_palettes":{},"groups":{}, "fixtures":{}}, fixtures_build)
+PRESETS        = CONFIG.register("presets", "custom_presets.json", {"group_presets":{}, "band_targets":[], "apply_order":[]}, check_object)
+CUE_LISTS      = CONFIG.register("cue_lists", "cue_lists.json", {"songs":{}}, check_object)
+FX_PRESETS     = CONFIG.register("fx_presets", "effect_presets.json", {"presets":{}, "clusters":{}, "subs":{}}, check_object)
+
+def cluster_index(d):
+    """key → cluster, and key → next key in list order (wraps)."""
+    keys = [c["key"] for c in d["clusters"]]
+    return {c["key"]: c for c in d["clusters"]}, {k: keys[(i + 1) % len(keys)] for i, k in enumerate(keys)}
+
+AI_CLUSTER_IDX, _ = cluster_index(AI_CLUSTERS)
+BAND_CLUSTER_IDX, BAND_NEXT = cluster_index(BAND_CLUSTERS)
+
+STATE_PATH     = f"{DATA}/state.json"
+STATE          = StateStore(jload(STATE_PATH, {}))
+REHEARSAL      = jload(f"{DATA}/rehearsal_positions.json", {})
+SCENES_PATH    = f"{DATA}/scenes.lss"          # binaire scene-bibliotheek (scene_store.py)
+BAND_PRESETS_PATH = f"{DATA}/band_presets.lss"  # idem, per band target
+LEGACY_JSON    = {"scenes": f"{DATA}/scenes.json", "band_presets": f"{DATA}/band_presets.json"}
 
 def sdef(key, val):
     if key not in STATE: STATE[key] = val
     return STATE[key]
-def save_state(): jsave(f"{BASE}/data/state.json", STATE)
 
-# --- Normalize tube DMX 'mode' to active channel map ---
-_TUBE = FIXTURES.get("fixtures", {}).get("tube_dmx")
-if _TUBE and "modes" in _TUBE:
-    active = _TUBE.get("mode", "simple")
-    _TUBE["ch"] = _TUBE["modes"].get(active, _TUBE["modes"]["simple"])
+# ---------- State persistence (debounced, background) ----------
+STATE_FLUSH_S = CFG.get("state_flush_s", 2.0)
+_STATE_DIRTY  = threading.Event()
+_STATE_IO     = threading.Lock()
+
+def save_state():
+    """Mark STATE dirty; the saver thread writes it at most every STATE_FLUSH_S seconds."""
+    _STATE_DIRTY.set()
+    STATE_FEED.poke()
+
+def flush_state():
+    with _STATE_IO:
+        if not _STATE_DIRTY.is_set(): return
+        _STATE_DIRTY.clear()
+        try:
+            jsave(STATE_PATH, STATE.to_dict(), indent=None)
+        except Exception:
+            _STATE_DIRTY.set()   # I/O-fout: volgende ronde opnieuw
+            raise
+
+def state_saver_loop():
+    while True:
+        time.sleep(STATE_FLUSH_S)
+        try: flush_state()
+        except Exception: pass
+
+atexit.register(flush_state)   # backup: de SIGTERM-handler (shutdown) slaat al op
+
+# ---------- State feed (versioned diffs for SSE clients and MIDI bridges) ----------
+from statefeed import StateFeed
+STATE_FEED = StateFeed(STATE, interval=CFG.get("state_feed_s", 0.1))
+SSE_STATS = {"clients": 0, "connects": 0, "resyncs": 0}
 
 # ---------- Init state ----------
 sdef("mode", "ai")                                  # ai | band | manual
@@ -74,38 +133,131 @@ sdef("wled_tubes", {"on": True, "fx": "Solid", "speed": 120, "intensity": 255})
 sdef("tube_dmx", {"pattern": "fade_up", "speed": 64, "strobe": 0, "dim": 160})
 sdef("strobo_dmx", {"rate": 0, "dim": 255})
 
-# ---------- DMX via OLA ----------
-DMX_BUF = bytearray(512)
-UNIV = CFG.get("dmx_universe", 0)
-try:
-    from ola.ClientWrapper import ClientWrapper
-    WR = ClientWrapper()
-    OLA = WR.Client()
-    def dmx_send():
-        OLA.SendDmx(UNIV, DMX_BUF)
-    def dmx_set(start, ch_map, values):
-        for k, v in values.items():
-            ch = ch_map.get(k)
-            if ch is None: continue
-            idx = start + ch - 2
-            if 0 <= idx < 512: DMX_BUF[idx] = max(0, min(255, int(v)))
-        dmx_send()
-except Exception:
-    def dmx_send(): pass
-    def dmx_set(start, ch_map, values): pass
+# ---------- Metrics ----------
+from metrics import Metrics, SamplingProfiler, stats_gauges
+METRICS  = Metrics()
+PROFILER = SamplingProfiler()
+
+# ---------- DMX output ----------
+from dmx_output import DmxOutput, make_backends
+from patch import FixturePatch
+UNIV = FIXTURES.get("meta", {}).get("dmx_universe", CFG.get("dmx_universe", 0))
+PATCH = FixturePatch(FIXTURES, UNIV)
+DMX = DmxOutput(make_backends(CFG.get("dmx_output") or {}), PATCH.universes,
+                refresh_hz=CFG.get("dmx_refresh_hz", 40),
+                keepalive_s=CFG.get("dmx_keepalive_s", 1.0))
+DMX_BUF = DMX.buf            # alle universes achter elkaar, 512 bytes per universe
+DMX.observe = lambda univ, ms: METRICS.observe("dmx_send", ms, universe=univ)
+
+def dmx_send():
+    DMX.mark_dirty()
+
+def dmx_set(name, values):
+    """Raw attribute values (dim/pan/...) for one fixture, via the compiled patch."""
+    DMX.write(PATCH.resolve(name, values))
+
+def dmx_group_set(group, attr, value):
+    """One vectorized write of `attr` on every fixture in `group`."""
+    DMX.write_idx(PATCH.group_idx(group, attr), value)
 
 # ---------- WLED ----------
-def wled_post(url, payload):
-    try: requests.post(url, json=payload, timeout=0.25)
-    except: pass
+from wled_output import WledSender
+WLED = WledSender(timeout=CFG.get("wled_timeout_s", 0.25),
+                  backoff_max=CFG.get("wled_backoff_max_s", 8.0),
+                  refresh_s=CFG.get("wled_refresh_s", 10.0),
+                  observe=lambda dev, ms, ok: METRICS.observe("wled_post", ms, device=dev, ok=int(ok)))
 
 def wled_set(which, on=True, fx="Solid", speed=120, intensity=160, color_hex="#FFFFFF"):
     url = (CFG.get("wled") or {}).get(which)
-    if not url: return
-    fxid = WLED_FX.get(fx, 0)
+    if not url or (on and rt_streaming(which, fx)): return     # uit gaat altijd via JSON
+    fxid = WLED_FX.get(fx, PIXEL_FX.get(fx, 0))
     r=int(color_hex[1:3],16); g=int(color_hex[3:5],16); b=int(color_hex[5:7],16)
     data={"on":bool(on), "bri":max(1,intensity), "seg":[{"fx":fxid,"sx":speed,"ix":intensity,"col":[[r,g,b]],"pal":0}]}
-    wled_post(url, data)
+    WLED.submit(which, url, data)
+
+# ---------- WLED realtime (UDP pixel streaming) ----------
+RT_CFG = CFG.get("wled_realtime") or {}
+RT_TARGET = {"guirlande": "guirlande", "tube_L": "wled_tubes", "tube_R": "wled_tubes"}
+WLED_RT = None
+if RT_CFG.get("enabled"):
+    import pixel_fx
+    from wled_realtime import WledRealtime
+
+def rt_active(which, fx):
+    """Pixel FX on a realtime device are streamed over UDP instead of posted to /json/state."""
+    return WLED_RT is not None and which in WLED_RT.devices and fx in pixel_fx.RENDERERS
+
+def rt_streaming(which, fx):
+    """True while `which` really gets UDP frames: pixel FX, device on and AI output active.
+    Only then is the JSON post skipped; otherwise WLED falls back to its last JSON state."""
+    tgt = RT_TARGET.get(which)
+    return (rt_active(which, fx) and STATE["mode"] == "ai" and STATE["ai_enabled"]
+            and bool(STATE["ai_include"].get(tgt)) and STATE[tgt]["on"])
+
+def rt_render(which, t, leds):
+    tgt = RT_TARGET.get(which)
+    if tgt is None: return None
+    st = STATE[tgt]
+    if not rt_streaming(which, st["fx"]): return None
+    # speed schaalt het tempo in machten van 2 zodat de FX op de beat blijft
+    mult = 2.0 ** round(math.log2(max(16, st["speed"]) / 128.0))
+    beat = beat_clock(t) * mult
+    return pixel_fx.render(st["fx"], leds, beat, _hex_to_rgb(main_color_ai()), st["intensity"], reverse=(which == "tube_R"))
+
+# ---------- Timers (momentary releases) ----------
+from timers import TimerWheel
+TIMERS = TimerWheel(tick=0.01)
+
+# ---------- Audio analysis ----------
+AUDIO_CFG = CFG.get("audio") or {}
+AUDIO = None
+if AUDIO_CFG.get("enabled", False) and AUDIO_CFG.get("source"):   # aanzetten vraagt sounddevice (requirements.txt)
+    from audio import AudioWorker
+    AUDIO = AudioWorker(AUDIO_CFG)
+
+from scheduler import TickScheduler, BeatClock
+BEAT = BeatClock(STATE.get("ai_bpm", 128))
+
+def beat_clock(t):
+    """Beat position at monotonic time t: from the audio beat tracker when live, else from ai_bpm."""
+    feat = AUDIO.features() if AUDIO else None
+    if feat:
+        b = feat["beat_count"] + feat["beat_phase"] + (t - feat["t"]) * feat["bpm"] / 60.0
+        BEAT.follow(t, b, feat["bpm"])     # valt de analyse weg, dan loopt de klok vanaf hier door
+        return b
+    return BEAT.beat(t, STATE.get("ai_bpm", 128))
+
+# ---------- Effects (LFO/chase overlay on the DMX frame) ----------
+from effects import EffectEngine, expand as fx_expand
+EFFECTS = EffectEngine(PATCH, beat_clock)
+DMX.overlay = EFFECTS
+_FX_KEY = {"k": None}
+
+def fx_sync():
+    """In AI mode the effects follow the sub (else the cluster); otherwise STATE["fx_presets"]."""
+    if _FX_KEY.get("v") == STATE.version: return          # niets veranderd sinds de vorige tick
+    _FX_KEY["v"] = STATE.version
+    EFFECTS.level = STATE.get("fx_level", 1.0)
+    if STATE["mode"] == "ai":
+        inc = STATE["ai_include"]
+        spec = (FX_PRESETS["subs"].get(STATE["ai_sub"]) or FX_PRESETS["clusters"].get(STATE["ai_cluster"])) \
+               if STATE["ai_enabled"] else None
+        key = ("ai", json.dumps(spec), tuple(k for k, v in inc.items() if v))
+    else:
+        inc, spec = None, STATE.get("fx_presets")
+        key = ("manual", json.dumps(spec))
+    if key == _FX_KEY["k"]: return
+    _FX_KEY["k"] = key
+    effs = fx_expand(spec, FX_PRESETS["presets"])
+    if inc is not None: effs = [e for e in effs if inc.get(e.get("group"), True)]
+    EFFECTS.set(effs)
+    DMX.mark_dirty()                                       # nieuw/gewist effect meteen in het volgende frame
+
+def fx_check(spec):
+    """Compile `spec` on a scratch engine; raises on an unknown preset name or a bad inline effect."""
+    for s in (spec if isinstance(spec, list) else [spec]):
+        if isinstance(s, str) and s not in FX_PRESETS["presets"]: raise ValueError(f"unknown preset {s}")
+    EffectEngine(PATCH).set(fx_expand(spec, FX_PRESETS["presets"]))
 
 # ---------- Fixture helpers ----------
 def fixture_caps(name):
@@ -121,17 +273,21 @@ def fixture_caps(name):
                         FIXTURES.get("gobo_maps", {}).get("scanner_gobo", {})).keys())
     return {"name": name, "start": fx.get("start"), "caps": caps, "gobo_choices": gobomap}
 
-def _hex_to_rgb(hexv):
-    return int(hexv[1:3],16), int(hexv[3:5],16), int(hexv[5:7],16)
+from color_match import ColorMatcher, hex_to_rgb as _hex_to_rgb
+_CM_CFG = CFG.get("color_match") or {}
 
-def _hex_dist(a, b):
-    ar,ag,ab=_hex_to_rgb(a); br,bg,bb=_hex_to_rgb(b)
-    return (ar-br)**2+(ag-bg)**2+(ab-bb)**2
+def color_matcher(fixtures):
+    return ColorMatcher(fixtures, metric=_CM_CFG.get("metric", "rgb"), lut_bits=_CM_CFG.get("lut_bits", 5))
 
-def dmx_apply_fixture(name, values):
+COLOR_MATCH = color_matcher(FIXTURES)
+CM_POOL = ThreadPoolExecutor(1, thread_name_prefix="color-match")   # LUT-bouw na een reload, niet op de engine-thread
+_CM_NEXT = {"f": None}                                             # future van de nieuwste bouw
+
+def fixture_writes(name, values):
+    """Resolve hex colours and direct values into the attribute writes for one fixture."""
     fx = FIXTURES["fixtures"].get(name)
-    if not fx: return
-    start, ch = fx["start"], fx["ch"]
+    if not fx: return {}
+    ch = PATCH.channels(name)
     write = {}
 
     # 1) HEX kleur → RGB of → color wheel
@@ -143,47 +299,93 @@ def dmx_apply_fixture(name, values):
             if mc.get("white_channel") and "w" in ch:
                 # optioneel: eenvoudige warm/cool mix; hier 0
                 write["w"] = 0
-        elif "wheel" in mc and "color" in ch:
-            wheel = mc["wheel"]["map"]
-            # kies dichtstbijzijnde wheel-kleur
-            pal = FIXTURES.get("color_palettes", {})
-            best_val = 0; best_d = 10**9
-            for cname, cval in wheel.items():
-                hex_ref = pal.get(cname, "#FFFFFF")
-                d = _hex_dist(hexv, hex_ref)
-                if d < best_d: best_d, best_val = d, cval
-            write["color"] = best_val
-        elif "wheel_combo" in mc and "gobo_color1" in ch:
-            # dual scan: zet beide color/gobo-slots naar dichtstbijzijnde naam (simple)
-            wheel = mc["wheel_combo"]["map"]
-            pal = FIXTURES.get("color_palettes", {})
-            def nearest_val():
-                best = list(wheel.items())[0]
-                best_d = 10**9
-                for cname, cval in wheel.items():
-                    hex_ref = pal.get(cname.split("+")[0], "#FFFFFF")
-                    d = _hex_dist(values["hex"], hex_ref)
-                    if d < best_d: best_d, best = d, (cname, cval)
-                return best[1]
-            v = nearest_val()
-            write["gobo_color1"] = v
-            if "gobo_color2" in ch: write["gobo_color2"] = v
+        elif (m := COLOR_MATCH.match(name, hexv)):
+            # dichtstbijzijnde wheel-kleur (voorberekende LUT + LRU)
+            kind, v = m
+            if kind == "wheel" and "color" in ch:
+                write["color"] = v
+            elif kind == "wheel_combo" and "gobo_color1" in ch:
+                # dual scan: zet beide color/gobo-slots naar de dichtstbijzijnde combo
+                write["gobo_color1"] = v
+                if "gobo_color2" in ch: write["gobo_color2"] = v
 
     # 2) Directe waarden (pan/tilt/dim/strobe/gobo/rgbw/etc.)
     for k in ("pan","tilt","dim","strobe","color","gobo","r","g","b","w","pattern","speed","macro","segment","rate","mode","rotation","zoom"):
         if k in values and k in ch:
             write[k] = values[k]
+    return write
 
-    dmx_set(start, ch, write)
+def dmx_apply_fixture(name, values):
+    dmx_set(name, fixture_writes(name, values))
+
+# pan/tilt/dim/kleurmenging faden (LTP), wheel/gobo/strobe/macro-kanalen snappen bij de start
+FADE_ATTRS = {"pan","pan_fine","pan1","pan2","tilt","tilt_fine","tilt1","tilt2","dim","r","g","b","w","zoom"}
+
+_COLOR_OUT = {"r","g","b","color","gobo_color1"}
+
+def dmx_apply_many(looks, fade=0.0):
+    """Apply {fixture: values} in one output frame, crossfading FADE_ATTRS over `fade` seconds.
+    Returns {fixture: [keys]} of the values the fixture could not take."""
+    snap, glide, rejected = [], [], {}
+    for name, values in looks.items():
+        ch = PATCH.channels(name)
+        w = fixture_writes(name, values)
+        for k, v in w.items():
+            if k in ch: (glide if fade > 0 and k in FADE_ATTRS else snap).append((ch[k], v))
+        bad = [k for k in values if k not in ch and not (k == "hex" and _COLOR_OUT & w.keys())]
+        if bad: rejected[name] = bad
+    if glide: DMX.fade(glide, fade, snap)
+    else:     DMX.write(snap)
+    return rejected
+
+# ---------- Scene library (binary snapshots, masked diff recall) ----------
+from scene_store import SceneLibrary, patch_mask, merge as scene_merge, diff as scene_diff
+SCENE_ATTRS = ("pan","tilt","dim","strobe","color","gobo","r","g","b","w")
+FADE_MASK = patch_mask(PATCH, FADE_ATTRS)
+SCENES = SceneLibrary(SCENES_PATH, PATCH, SCENE_ATTRS, legacy=LEGACY_JSON["scenes"], writes=fixture_writes)
+BAND_PRESETS = SceneLibrary(BAND_PRESETS_PATH, PATCH, SCENE_ATTRS, legacy=LEGACY_JSON["band_presets"], writes=fixture_writes)
+SCENE_STATS = {"recalls": 0, "channels_written": 0, "recall_us_last": 0.0, "recall_us_max": 0.0}
+
+def scene_recall(parts, fade=0.0):
+    """Recall [(values, mask)] (later parts win) in one output frame: only masked channels that
+    differ from the live frame are written; FADE_ATTRS channels crossfade over `fade` seconds."""
+    t0 = time.perf_counter()
+    values, mask = parts[0] if len(parts) == 1 else scene_merge(parts)
+    # kanalen die nog naar iets anders faden altijd meenemen, ook als ze nu toevallig gelijk staan
+    idx, vals = scene_diff(values, mask, DMX.view, DMX.fades.active if DMX.fades.busy else None)
+    DMX.write_masked(idx, vals, FADE_MASK[idx] if fade > 0 else None, fade)
+    us = (time.perf_counter() - t0) * 1e6
+    st = SCENE_STATS
+    st["recalls"] += 1; st["channels_written"] += len(idx)
+    st["recall_us_last"] = us; st["recall_us_max"] = max(st["recall_us_max"], us)
+    return len(idx)
+
+def fixture_select(sel):
+    """Selector → fixture names: "mh_L", "group:moving_head", "all"/"*", or a comma list of those.
+    Returns None when any part is unknown."""
+    names = []
+    for part in str(sel).split(","):
+        part = part.strip()
+        if part in ("all", "*"):           names += list(PATCH.fixtures)
+        elif part.startswith("group:"):
+            if part[6:] not in FIXTURES.get("groups", {}): return None
+            names += [n for n in FIXTURES["groups"][part[6:]] if n in PATCH.fixtures]
+        elif part in PATCH.fixtures:       names.append(part)
+        else: return None
+    return names
 
 # ---------- Color selection ----------
+AI_CLUSTER_COLORS = {
+    "tech_house":"#00FFFF", "rock_pop":"#FFE6CC", "goa_psy":"#FF00FF", "dnb_dub":"#7FDBFF",
+    "retro_7090":"#FFB000", "party":"#FFFFFF", "electro_swing":"#FFE6CC", "slow":"#FFE6CC"
+}
+AI_COLOR_DEPS   = ("ai_color_lock", "ai_cluster")                   # STATE-keys waar main_color_ai van afhangt
+BAND_COLOR_DEPS = ("band_color_lock", "band_palette")
+
 def main_color_ai():
     if STATE["ai_color_lock"]["enabled"]:
         return STATE["ai_color_lock"]["hex"]
-    return {
-        "tech_house":"#00FFFF", "rock_pop":"#FFE6CC", "goa_psy":"#FF00FF", "dnb_dub":"#7FDBFF",
-        "retro_7090":"#FFB000", "party":"#FFFFFF", "electro_swing":"#FFE6CC", "slow":"#FFE6CC"
-    }.get(STATE["ai_cluster"], "#FFFFFF")
+    return AI_CLUSTER_COLORS.get(STATE["ai_cluster"], "#FFFFFF")
 
 def main_color_band():
     if STATE["band_color_lock"]["enabled"]:
@@ -191,95 +393,296 @@ def main_color_band():
     return COLORS.get(STATE.get("band_palette"), "#FFE6CC")
 
 # ---------- Engines ----------
-def ai_choose_sub():
-    cl = next((c for c in AI_CLUSTERS["clusters"] if c["key"]==STATE["ai_cluster"]), None)
+def ai_choose_sub(feat=None):
+    cl = AI_CLUSTER_IDX.get(STATE["ai_cluster"])
     if not cl or not cl.get("subs"): return None
-    i = (int(time.time())//16) % len(cl["subs"])
-    return cl["subs"][i]
+    subs = cl["subs"]
+    if feat:   # met audio: sub volgens energie (subs-lijst van rustig naar intens)
+        return subs[min(len(subs) - 1, int(feat["energy"] * len(subs)))]
+    return subs[int(time.monotonic() // 16) % len(subs)]
 
 def band_next_cluster():
-    order = [c["key"] for c in BAND_CLUSTERS["clusters"]]
-    if STATE["band_cluster"] not in order: return "intro"
-    idx = (order.index(STATE["band_cluster"]) + 1) % len(order)
-    return order[idx]
+    return BAND_NEXT.get(STATE["band_cluster"], "intro")
 
 def tube_dmx_apply(on=True, pattern="fade_up", speed=64, strobe=0, dim=160):
-    fx = FIXTURES.get("fixtures",{}).get("tube_dmx")
-    if not fx: return
-    start, ch = fx["start"], fx["ch"]
     pat = {"fade_up":10,"wave":30,"pulse":50,"chaos":70,"rainbow":90}.get(pattern,10)
-    dmx_set(start, ch, {"pattern":pat, "speed":speed, "strobe":strobe, "dim":dim})
+    dmx_set("tube_dmx", {"pattern":pat, "speed":speed, "strobe":strobe, "dim":dim})
 
 def strobo_dmx_apply(rate, dim):
-    fx = FIXTURES.get("fixtures",{}).get("strobe_dmx")
-    if not fx: return
-    start, ch = fx["start"], fx["ch"]
-    dmx_set(start, ch, {"rate":rate, "dim":dim})
+    dmx_set("strobe_dmx", {"rate":rate, "dim":dim})
 
 def apply_blinders(top_val=None, bottom_val=None):
-    fxt = FIXTURES["fixtures"]
-    if "bl_top" in fxt and top_val is not None:
-        dmx_set(fxt["bl_top"]["start"], fxt["bl_top"]["ch"], {"dim": top_val})
-    if "bl_bottom" in fxt and bottom_val is not None:
-        dmx_set(fxt["bl_bottom"]["start"], fxt["bl_bottom"]["ch"], {"dim": bottom_val})
+    if top_val is not None:    dmx_set("bl_top", {"dim": top_val})
+    if bottom_val is not None: dmx_set("bl_bottom", {"dim": bottom_val})
+
+_AI_PHRASE = {"n": None}
+
+def ai_mod(feat):
+    # intensiteit volgt de bas (8 stappen, zodat de WLED-sender niet elke tick iets nieuws krijgt)
+    return (0.4 + 0.6 * round(min(1.0, feat["bass"]) * 8) / 8) if feat else 1.0
 
 def ai_tick():
     if not STATE["ai_enabled"]: return
-    if STATE["ai_full"] and (STATE["ai_sub"] is None or int(time.time())%16==0):
-        STATE["ai_sub"] = ai_choose_sub()
-
-    col = main_color_ai()
-    inc = STATE["ai_include"]
-
-    if inc.get("guirlande"):
-        wled_set("guirlande", True, STATE["guirlande"]["fx"], STATE["guirlande"]["speed"], STATE["guirlande"]["intensity"], col)
-    if inc.get("wled_tubes"):
-        t = STATE["wled_tubes"]
-        for seg in ("tube_L","tube_R"):
-            wled_set(seg, t["on"], t["fx"], t["speed"], t["intensity"], col)
-    if inc.get("tube_dmx"):
-        td = STATE["tube_dmx"]
-        tube_dmx_apply(True, td["pattern"], td["speed"], td["strobe"], td["dim"])
+    feat = AUDIO.features() if AUDIO else None
+    if STATE["ai_full"]:
+        # nieuwe sub per frase van 32 beats (met audio) of per blok van 16 s: één keer per grens
+        phrase = feat["beat_count"] // 32 if feat else int(time.monotonic() // 16)
+        if STATE["ai_sub"] is None or phrase != _AI_PHRASE["n"]:
+            _AI_PHRASE["n"] = phrase; STATE["ai_sub"] = ai_choose_sub(feat)
+    if feat and abs(feat["bpm"] - STATE.get("ai_bpm", 0)) >= 1:
+        STATE["ai_bpm"] = round(feat["bpm"])
+    RENDER.run("ai_dmx")
+
+def ai_wled():
+    if STATE["ai_enabled"]: RENDER.run("ai_wled")
+
+# ai-outputs: live-inputs zijn de audio-modulatie (en de strobe-piek voor de tube)
+def ai_live_mod():
+    return ai_mod(AUDIO.features() if AUDIO else None)
+
+def ai_live_tube():
+    feat = AUDIO.features() if AUDIO else None
+    peak = int(feat["high"] * 200) if feat and feat["high"] > 0.85 and feat["energy"] > 0.6 else 0   # piek in het hoog bij hoge energie
+    return ai_mod(feat), peak
+
+def ai_render_tube_dmx(live):
+    if not STATE["ai_include"].get("tube_dmx"): return
+    mod, peak = live
+    td = STATE["tube_dmx"]
+    tube_dmx_apply(True, td["pattern"], td["speed"], max(td["strobe"], peak), int(td["dim"] * mod))
+
+def ai_render_wled(key, seg):
+    def render(mod):
+        if not STATE["ai_include"].get(key): return
+        d = STATE[key]
+        wled_set(seg, d["on"], d["fx"], d["speed"], int(d["intensity"] * mod), main_color_ai())
+    return render
+
+_BAND_ADV = {"t": None}
+
+# ---------- Cue lists (band mode) ----------
+from cues import CuePlayer
+
+def cue_fire(song, i, cue):
+    """Apply one cue: band cluster/sub, then BAND_PRESETS target and/or scene with the cue's fade."""
+    if "cluster" in cue: STATE["band_cluster"] = cue["cluster"]
+    if "sub" in cue:     STATE["band_sub"]     = cue["sub"]
+    fade = float(cue.get("fade", CFG.get("band_fade_s", 1.5)))
+    parts = [lib.get(cue[k]) for k, lib in (("preset", BAND_PRESETS), ("scene", SCENES)) if cue.get(k) in lib]
+    if parts: scene_recall(parts, fade)
+    STATE["cue"] = CUES.status()
+    save_state()
 
-def band_tick():
-    col = main_color_band()
-    inc = STATE["band_include"]
-
-    if inc.get("guirlande"):
-        wled_set("guirlande", True, "Breathe", 96, 120, col)
-    if inc.get("wled_tubes"):
-        for seg in ("tube_L","tube_R"):
-            wled_set(seg, True, "Solid", 0, 255, col)
-    if inc.get("tube_dmx"):
-        tube_dmx_apply(True, "fade_up", 64, 0, 180)
-
-    if STATE["band_running"] and not STATE["band_paused"] and STATE.get("ai_full"):
-        if int(time.time()) % 32 == 0:
-            STATE["band_cluster"] = band_next_cluster()
+CUES = CuePlayer(CUE_LISTS.get("songs"), cue_fire)
 
-def engine_loop():
-    while True:
-        try:
-            if STATE["mode"] == "ai":
-                ai_tick()
-            elif STATE["mode"] == "band":
-                band_tick()
-            time.sleep(0.02)
-        except Exception:
-            time.sleep(0.1)
+def band_wled():
+    RENDER.run("band_wled")
 
-threading.Thread(target=engine_loop, daemon=True).start()
+def band_render_wled(key, seg, fx, speed, intensity):
+    def render(_):
+        if STATE["band_include"].get(key): wled_set(seg, True, fx, speed, intensity, main_color_band())
+    return render
+
+def band_render_tube_dmx(_):
+    if STATE["band_include"].get("tube_dmx"): tube_dmx_apply(True, "fade_up", 64, 0, 180)
+
+def band_tick():
+    RENDER.run("band_dmx")
+
+    # auto-doorschuiven elke 32 s (alleen zonder cue-list): één keer per interval, niet elke tick in die seconde
+    if STATE["band_running"] and not STATE["band_paused"] and STATE.get("ai_full") and CUES.song is None:
+        now = time.monotonic()
+        if _BAND_ADV["t"] is None: _BAND_ADV["t"] = now + 32.0
+        elif now >= _BAND_ADV["t"]:
+            _BAND_ADV["t"] += 32.0
+            STATE["band_cluster"] = band_next_cluster()
+    else:
+        _BAND_ADV["t"] = None
+
+# ---------- Render outputs (alleen opnieuw bij gewijzigde inputs) ----------
+from render_graph import RenderGraph
+ENGINE_CFG = CFG.get("engine") or {}
+RENDER = RenderGraph(STATE, refresh_s=ENGINE_CFG.get("refresh_s", 2.0))
+RENDER.add("ai_dmx", "tube_dmx", ("mode", "ai_enabled", "ai_include", "tube_dmx"), ai_render_tube_dmx, ai_live_tube)
+for _seg, _key in (("guirlande", "guirlande"), ("tube_L", "wled_tubes"), ("tube_R", "wled_tubes")):
+    RENDER.add("ai_wled", _seg, ("mode", "ai_enabled", "ai_include", _key) + AI_COLOR_DEPS,
+               ai_render_wled(_key, _seg), ai_live_mod)
+RENDER.add("band_dmx", "tube_dmx", ("mode", "band_include"), band_render_tube_dmx)
+RENDER.add("band_wled", "guirlande", ("mode", "band_include") + BAND_COLOR_DEPS,
+           band_render_wled("guirlande", "guirlande", "Breathe", 96, 120))
+for _seg in ("tube_L", "tube_R"):
+    RENDER.add("band_wled", _seg, ("mode", "band_include") + BAND_COLOR_DEPS,
+               band_render_wled("wled_tubes", _seg, "Solid", 0, 255))
+
+# ---------- Engine scheduler ----------
+ENGINE_TICK_S = 1.0 / float(ENGINE_CFG.get("render_hz", 50))
+
+def engine_stage(name, fn):
+    """Run one engine stage, timed; an exception is counted per stage instead of silently swallowed."""
+    with METRICS.timer("engine_stage", stage=name):
+        try: fn()
+        except Exception as e:
+            METRICS.error(name, e); return False
+    return True
+
+def engine_render():
+    """DMX side of the engine: mode tick (tube DMX, sub/cluster changes) and the effect set."""
+    t0 = time.perf_counter()
+    if STATE["mode"] == "ai":     engine_stage("ai_tick", ai_tick)
+    elif STATE["mode"] == "band": engine_stage("band_tick", band_tick)
+    engine_stage("fx_sync", fx_sync)
+    METRICS.observe("engine_tick", (time.perf_counter() - t0) * 1000.0)
+
+def engine_wled():
+    if STATE["mode"] == "ai":     engine_stage("ai_wled", ai_wled)
+    elif STATE["mode"] == "band": engine_stage("band_wled", band_wled)
+
+def engine_housekeeping():
+    """Slow work: config hot reload, swapping in a finished colour matcher and the cue countdown
+    in STATE while a follow is pending."""
+    engine_stage("config_reload", CONFIG.check)
+    if (f := _CM_NEXT["f"]) is not None and f.done(): engine_stage("color_match_swap", swap_color_match)
+    if CUES.song is not None and (st := CUES.status())["next_in"] is not None: STATE["cue"] = st
+
+# ---------- Config hot reload ----------
+# Elke hook bouwt eerst alles wat van het nieuwe bestand afhangt en wisselt dan pas de referenties;
+# gooit hij een fout, dan blijft de vorige versie actief (zie CONFIG.status()).
+def swap_config(name):
+    def hook(value): globals()[name] = value
+    return hook
+
+def swap_ai_clusters(d):
+    global AI_CLUSTERS, AI_CLUSTER_IDX
+    AI_CLUSTERS, AI_CLUSTER_IDX = d, cluster_index(d)[0]
+
+def swap_band_clusters(d):
+    global BAND_CLUSTERS, BAND_CLUSTER_IDX, BAND_NEXT
+    BAND_CLUSTERS, (BAND_CLUSTER_IDX, BAND_NEXT) = d, cluster_index(d)
+
+def swap_colors(d):
+    global COLORS
+    COLORS = d
+    RENDER.invalidate("band_wled")                # band-kleur komt uit het palet
+
+def swap_fixtures(d):
+    global FIXTURES, PATCH, FADE_MASK
+    patch = FixturePatch(d, d.get("meta", {}).get("dmx_universe", CFG.get("dmx_universe", 0)))
+    if patch.universes != PATCH.universes:
+        raise ConfigError(f"universes {PATCH.universes} → {patch.universes}: restart needed")
+    FIXTURES, PATCH, FADE_MASK = d, patch, patch_mask(patch, FADE_ATTRS)
+    _CM_NEXT["f"] = CM_POOL.submit(color_matcher, d)     # LUTs duren ~0.5 s: tot dan de vorige matcher
+    EFFECTS.patch = patch; EFFECTS.set(EFFECTS.active); DMX.mark_dirty()
+    SCENES.repatch(patch); BAND_PRESETS.repatch(patch)
+    RENDER.invalidate()
+
+def swap_color_match():
+    global COLOR_MATCH
+    f, _CM_NEXT["f"] = _CM_NEXT["f"], None
+    COLOR_MATCH = f.result()
+
+def swap_cue_lists(d):
+    global CUE_LISTS
+    CUE_LISTS, CUES.songs = d, d.get("songs") or {}
+    if CUES.song is not None and CUES.song not in CUES.songs: CUES.stop(); CUES.song = None
+
+def swap_fx_presets(d):
+    global FX_PRESETS
+    FX_PRESETS = d
+    _FX_KEY.update(k=None, v=None)                # fx_sync bouwt de effecten opnieuw op
+
+for _name, _fn in (("settings", swap_config("CFG")), ("ai_clusters", swap_ai_clusters),
+                   ("band_clusters", swap_band_clusters), ("colors", swap_colors),
+                   ("wled_fx", swap_config("WLED_FX")), ("pixel_fx", swap_config("PIXEL_FX")),
+                   ("fixtures", swap_fixtures), ("presets", swap_config("PRESETS")),
+                   ("cue_lists", swap_cue_lists), ("fx_presets", swap_fx_presets)):
+    CONFIG.on_swap(_name, _fn)
+
+ENGINE = TickScheduler(on_error=METRICS.error)
+ENGINE.every("render", ENGINE_TICK_S, engine_render)
+ENGINE.every("wled", 1.0 / float(ENGINE_CFG.get("wled_hz", 20)), engine_wled, phase=ENGINE_TICK_S / 2)
+ENGINE.every("housekeeping", float(ENGINE_CFG.get("housekeeping_s", 1.0)), engine_housekeeping, phase=0.25)
+
+DMX.start()
+TIMERS.start()
+CUES.start()
+if AUDIO: AUDIO.start()
+if RT_CFG.get("enabled"):
+    WLED_RT = WledRealtime(RT_CFG.get("devices"), rt_render, fps=RT_CFG.get("fps", 40), timeout_s=RT_CFG.get("timeout_s", 2))
+    WLED_RT.start()
+ENGINE.start()
+threading.Thread(target=state_saver_loop, daemon=True).start()
+STATE_FEED.start()
 
 # ---------- Flask ----------
 app = Flask(__name__, static_folder="web", static_url_path="")
 
+@app.before_request
+def _metrics_t0():
+    g.t0 = time.perf_counter()
+
+@app.after_request
+def _metrics_request(resp):
+    t0 = g.get("t0")
+    if t0 is not None:
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        METRICS.observe("http_request", (time.perf_counter() - t0) * 1000.0, route=route, method=request.method)
+        METRICS.inc("http_responses_total", code=f"{resp.status_code // 100}xx")
+    return resp
+
 @app.get("/")
 def root():
     return send_from_directory("web", "index.html")
 
+@app.before_request
+def _state_v0():
+    g.state_v = STATE.version
+
+def state_reply(**extra):
+    """Route reply with only the STATE keys changed since the request started (the rest comes via the feed)."""
+    return jsonify(ok=True, version=STATE.version, state=STATE.to_dict(STATE.changed_since(g.get("state_v", 0))), **extra)
+
 @app.get("/api/state")
 def api_state():
-    return jsonify(STATE)
+    """Full state; `?since=<version>` returns only the keys changed after that version (full when too old)."""
+    since = request.args.get("since", type=int)
+    if since is None: return jsonify(STATE.to_dict())
+    keys = STATE.changed_since(since)
+    return jsonify(version=STATE.version, full=keys is None, state=STATE.to_dict(keys))
+
+def _sse(event, v, data):
+    return f"id: {STATE_FEED.epoch}:{v}\nevent: {event}\ndata: {data}\n\n"
+
+@app.get("/api/state/stream")
+def api_state_stream():
+    """Server-Sent Events: a snapshot, then one `diff` event per STATE version.
+    A reconnect with Last-Event-ID ("epoch:version") resumes from the backlog instead of a new
+    snapshot; an id from another process run (server restarted) gets a snapshot."""
+    epoch, _, v = request.headers.get("Last-Event-ID", "").partition(":")
+    try: v = int(v) if epoch == STATE_FEED.epoch else None
+    except ValueError: v = None
+    if v is None and epoch: SSE_STATS["resyncs"] += 1
+    def stream(v):
+        SSE_STATS["clients"] += 1; SSE_STATS["connects"] += 1
+        try:
+            yield "retry: 2000\n\n"
+            while not STATE_FEED.closed:                   # shutdown: stream eindigen, worker vrij
+                diffs = STATE_FEED.since(v, 15.0) if v is not None else None
+                if diffs is None:
+                    if v is not None: SSE_STATS["resyncs"] += 1
+                    v, snap = STATE_FEED.snapshot()
+                    yield _sse("snapshot", v, json.dumps({"v": v, "state": snap}, separators=(",", ":")))
+                elif not diffs:
+                    yield ": ping\n\n"                 # houdt proxies/telefoons wakker, detecteert dode clients
+                for nv, _, text in diffs or ():
+                    yield _sse("diff", nv, text); v = nv
+        finally:
+            SSE_STATS["clients"] -= 1
+    return Response(stream(v), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/api/state/feed")
+def api_state_feed():
+    return jsonify(version=STATE_FEED.version, feed=STATE_FEED.stats, sse=SSE_STATS)
 
 @app.post("/api/mode")
 def api_mode():
@@ -291,7 +694,7 @@ def api_mode():
     if "ai_sub" in b:     STATE["ai_sub"]     = b["ai_sub"]
     if "band_cluster" in b: STATE["band_cluster"] = b["band_cluster"]
     save_state()
-    return jsonify(ok=True, state=STATE)
+    return state_reply()
 
 # -------- AI ----------
 @app.get("/api/ai/clusters")
@@ -305,7 +708,7 @@ def api_ai_select():
     if "cluster" in b: STATE["ai_cluster"] = b["cluster"]
     if "sub" in b:     STATE["ai_sub"]     = b["sub"]
     save_state()
-    return jsonify(ok=True, state=STATE)
+    return state_reply()
 
 @app.post("/api/ai/color")
 def api_ai_color():
@@ -313,7 +716,7 @@ def api_ai_color():
     if "enabled" in b: STATE["ai_color_lock"]["enabled"] = bool(b["enabled"])
     if "hex" in b:     STATE["ai_color_lock"]["hex"]     = str(b["hex"])
     save_state()
-    return jsonify(ok=True, ai_color_lock=STATE["ai_color_lock"])
+    return jsonify(ok=True, ai_color_lock=STATE["ai_color_lock"].to_dict())
 
 @app.post("/api/ai/include")
 def api_ai_include():
@@ -321,7 +724,7 @@ def api_ai_include():
     for k in list(STATE["ai_include"].keys()):
         if k in b: STATE["ai_include"][k] = bool(b[k])
     save_state()
-    return jsonify(ok=True, ai_include=STATE["ai_include"])
+    return jsonify(ok=True, ai_include=STATE["ai_include"].to_dict())
 
 # -------- Band ----------
 @app.get("/api/band/clusters")
@@ -335,7 +738,7 @@ def api_band_select():
     if "cluster" in b: STATE["band_cluster"] = b["cluster"]
     if "sub" in b:     STATE["band_sub"]     = b["sub"]
     save_state()
-    return jsonify(ok=True, state=STATE)
+    return state_reply()
 
 @app.post("/api/band/color")
 def api_band_color():
@@ -353,7 +756,7 @@ def api_band_color():
         for k in list(STATE["band_include"].keys()):
             if k in inc: STATE["band_include"][k] = bool(inc[k])
     save_state()
-    return jsonify(ok=True, state=STATE)
+    return state_reply()
 
 # ---- Show control (Band Pause/Stop, AI toggles) ----
 @app.post("/api/show/control")
@@ -365,8 +768,10 @@ def api_show_control():
             STATE["band_running"] = True; STATE["band_paused"] = False
         else:
             STATE["band_paused"] = not STATE["band_paused"]
+        CUES.pause(STATE["band_paused"])
     elif cmd == "band_stop":
         STATE["band_running"] = False; STATE["band_paused"] = False; STATE["band_cluster"] = "intro"
+        CUES.stop(); STATE["cue"] = CUES.status()
     elif cmd == "ai_toggle":
         STATE["ai_enabled"] = not STATE["ai_enabled"]
     elif cmd == "ai_full_toggle":
@@ -374,7 +779,59 @@ def api_show_control():
     else:
         return jsonify(ok=False, err="unknown cmd"), 400
     save_state()
-    return jsonify(ok=True, state=STATE)
+    return state_reply()
+
+# ---- Effect engine ----
+@app.get("/api/fx")
+def api_fx():
+    return jsonify(presets=sorted(FX_PRESETS["presets"]), active=EFFECTS.active, level=EFFECTS.level,
+                   manual=STATE.get("fx_presets"), stats=EFFECTS.stats)
+
+@app.post("/api/fx")
+def api_fx_set():
+    """{"presets": ["pars_chase", {...inline effect...}]} buiten AI-mode, {"level": 0..1}, {"clear": true}."""
+    b = request.json or {}
+    try:
+        if "presets" in b: fx_check(b["presets"])            # eerst valideren: niets kapots in STATE/state.json
+        level = max(0.0, min(1.0, float(b["level"]))) if "level" in b else None
+    except (TypeError, ValueError, AttributeError) as e:
+        return jsonify(ok=False, err=str(e)), 400
+    if b.get("clear"): STATE["fx_presets"] = []
+    if "presets" in b: STATE["fx_presets"] = b["presets"]
+    if level is not None: STATE["fx_level"] = level
+    fx_sync()
+    save_state()
+    return jsonify(ok=True, active=len(EFFECTS.active), channels=EFFECTS.stats["channels"])
+
+# ---- Cue lists (GO / back) ----
+@app.get("/api/cues")
+def api_cues():
+    songs = {k: {"label": v.get("label", k), "cues": [c.get("label") for c in v.get("cues", [])]}
+             for k, v in CUES.songs.items()}
+    return jsonify(songs=songs, status=CUES.status(), stats=CUES.stats)
+
+@app.post("/api/cues/control")
+def api_cues_control():
+    b = request.json or {}
+    cmd = b.get("cmd")
+    try:
+        if cmd == "load":
+            CUES.load(b.get("song")); STATE["mode"] = "band"
+            STATE["band_running"] = True; STATE["band_paused"] = False
+            if b.get("go"): CUES.go()
+        elif cmd == "go":   CUES.go()
+        elif cmd == "back": CUES.back()
+        elif cmd == "goto": CUES.goto(int(b.get("index", 0)))
+        elif cmd == "stop": CUES.stop()
+        elif cmd == "unload":
+            CUES.stop(); CUES.song = None
+        else:
+            return jsonify(ok=False, err="unknown cmd"), 400
+    except (KeyError, IndexError, ValueError):
+        return jsonify(ok=False, err="unknown song/index"), 400
+    STATE["cue"] = CUES.status()
+    save_state()
+    return jsonify(ok=True, status=STATE["cue"])
 
 # -------- Levels (faders) --------
 @app.post("/api/levels")
@@ -392,17 +849,11 @@ def api_levels():
     elif ctrl == "guirlande":
         STATE["guirlande"]["intensity"] = dval
     elif ctrl == "par_big_all":
-        for name in FIXTURES["groups"].get("pars_big", []):
-            fx = FIXTURES["fixtures"][name]
-            dmx_set(fx["start"], fx["ch"], {"dim": dval})
+        dmx_group_set("pars_big", "dim", dval)
     elif ctrl == "par_small_all":
-        for name in FIXTURES["groups"].get("pars_small", []):
-            fx = FIXTURES["fixtures"][name]
-            dmx_set(fx["start"], fx["ch"], {"dim": dval})
+        dmx_group_set("pars_small", "dim", dval)
     elif ctrl == "moving_par_lr":
-        for name in FIXTURES["groups"].get("moving_par", []):
-            fx = FIXTURES["fixtures"][name]
-            dmx_set(fx["start"], fx["ch"], {"dim": dval})
+        dmx_group_set("moving_par", "dim", dval)
     save_state()
     return jsonify(ok=True)
 
@@ -417,26 +868,19 @@ def api_params():
     elif ctrl == "strobe_dim":
         STATE["strobo_dmx"]["dim"]  = dval;  strobo_dmx_apply(STATE["strobo_dmx"]["rate"], STATE["strobo_dmx"]["dim"])
     elif ctrl == "washfx_dim":
-        for name in FIXTURES["groups"].get("wash_fx", []):
-            fx = FIXTURES["fixtures"][name]; dmx_set(fx["start"], fx["ch"], {"dim": dval})
+        dmx_group_set("wash_fx", "dim", dval)
     elif ctrl == "washfx_speed":
-        for name in FIXTURES["groups"].get("wash_fx", []):
-            fx = FIXTURES["fixtures"][name]; dmx_set(fx["start"], fx["ch"], {"macro": min(255, dval)})
+        dmx_group_set("wash_fx", "macro", min(255, dval))
     elif ctrl == "mh_pan":
-        for name in FIXTURES["groups"].get("moving_head", []):
-            fx = FIXTURES["fixtures"][name]; dmx_set(fx["start"], fx["ch"], {"pan": dval})
+        dmx_group_set("moving_head", "pan", dval)
     elif ctrl == "mh_tilt":
-        for name in FIXTURES["groups"].get("moving_head", []):
-            fx = FIXTURES["fixtures"][name]; dmx_set(fx["start"], fx["ch"], {"tilt": dval})
+        dmx_group_set("moving_head", "tilt", dval)
     elif ctrl == "scanner_pan":
-        for name in FIXTURES["groups"].get("scanner", []):
-            fx = FIXTURES["fixtures"][name]; dmx_set(fx["start"], fx["ch"], {"pan": dval})
+        dmx_group_set("scanner", "pan", dval)
     elif ctrl == "scanner_tilt":
-        for name in FIXTURES["groups"].get("scanner", []):
-            fx = FIXTURES["fixtures"][name]; dmx_set(fx["start"], fx["ch"], {"tilt": dval})
+        dmx_group_set("scanner", "tilt", dval)
     elif ctrl == "dualscan_speed":
-        for name in FIXTURES["groups"].get("dual_scan", []):
-            fx = FIXTURES["fixtures"][name]; dmx_set(fx["start"], fx["ch"], {"strobe": dval})
+        dmx_group_set("dual_scan", "strobe", dval)
     elif ctrl == "ai_variation":
         STATE["ai_variation"] = (val >= 64)
     elif ctrl == "ai_smooth":
@@ -466,11 +910,11 @@ def api_effects():
     elif target == "wled_tubes":
         if fx == "on_off":
             STATE["wled_tubes"]["on"] = not STATE["wled_tubes"]["on"]
-        elif fx in WLED_FX: STATE["wled_tubes"]["fx"] = fx
+        elif fx in WLED_FX or fx in PIXEL_FX: STATE["wled_tubes"]["fx"] = fx
     elif target == "guirlande":
         if fx == "on_off":
             STATE["guirlande"]["on"] = not STATE["guirlande"]["on"]
-        elif fx in WLED_FX: STATE["guirlande"]["fx"] = fx
+        elif fx in WLED_FX or fx in PIXEL_FX: STATE["guirlande"]["fx"] = fx
     elif target == "strobo":
         if fx == "ai_wave":   STATE["strobo_dmx"]["rate"] = 128
         if fx == "ai_pulse":  STATE["strobo_dmx"]["rate"] = 160
@@ -478,12 +922,10 @@ def api_effects():
         if fx == "ai_chaos":  STATE["strobo_dmx"]["rate"] = 220
         strobo_dmx_apply(STATE["strobo_dmx"]["rate"], STATE["strobo_dmx"]["dim"])
     elif target == "laser":
-        fxr = FIXTURES["fixtures"].get("laser")
-        if not fxr: return jsonify(ok=True)
-        if   fx == "laser_on":  dmx_set(fxr["start"], fxr["ch"], {"on":255})
-        elif fx == "laser_off": dmx_set(fxr["start"], fxr["ch"], {"on":0})
+        if   fx == "laser_on":  dmx_set("laser", {"on":255})
+        elif fx == "laser_off": dmx_set("laser", {"on":0})
     save_state()
-    return jsonify(ok=True, state=STATE)
+    return state_reply()
 
 # -------- Blinders presets (momentary/override) --------
 @app.post("/api/blinders")
@@ -502,10 +944,13 @@ def api_blinders():
     elif preset == "full_on":
         apply_blinders(255,255)
     elif preset == "full_toggle":
-        top_now = DMX_BUF[FIXTURES["fixtures"]["bl_top"]["start"]-1] if "bl_top" in FIXTURES["fixtures"] else 0
+        idx = PATCH.channels("bl_top").get("dim")
+        top_now = DMX_BUF[idx] if idx is not None else 0
         new = 0 if top_now>0 else 255; apply_blinders(new,new)
     if momentary and preset not in ("blackout_all","blackout_keep_guir","full_toggle"):
-        time.sleep(0.15); apply_blinders(0,0)
+        TIMERS.schedule(0.15, lambda: apply_blinders(0,0), key="blinders")   # nieuwe hit verlengt
+    else:
+        TIMERS.cancel("blinders")
     save_state()
     return jsonify(ok=True)
 
@@ -516,14 +961,34 @@ def api_strobo_dmx():
     momentary = bool(b.get("momentary", True))
     strobo_dmx_apply(STATE["strobo_dmx"]["rate"], STATE["strobo_dmx"]["dim"])
     if momentary:
-        time.sleep(0.1); strobo_dmx_apply(0, STATE["strobo_dmx"]["dim"])
+        TIMERS.schedule(0.1, lambda: strobo_dmx_apply(0, STATE["strobo_dmx"]["dim"]), key="strobo_dmx")
+    else:
+        TIMERS.cancel("strobo_dmx")
     return jsonify(ok=True)
 
 # -------- Fixtures list & per-fixture control --------
 @app.get("/api/fixtures")
 def api_fixtures_list():
     out = [fixture_caps(n) for n in FIXTURES.get("fixtures", {}).keys()]
-    return jsonify({"fixtures": out, "colors": COLORS})
+    return jsonify({"fixtures": out, "colors": COLORS, "groups": FIXTURES.get("groups", {})})
+
+@app.post("/api/fixture/batch")
+def api_fixture_batch():
+    """Many fixture writes in one request, applied in a single output frame.
+    {"writes": [{"target": "group:moving_head", "values": {...}}, {"target": "mh_L", "values": {...}}], "fade": 0}
+    or {"set": {"group:pars_big": {...}, "mh_L": {...}}}; later entries win per attribute."""
+    b = request.json or {}
+    entries = [(w.get("target"), w.get("values") or {}) for w in b.get("writes", [])] + list((b.get("set") or {}).items())
+    looks, unknown = {}, []
+    for target, values in entries:
+        names = fixture_select(target) if target else None
+        if names is None or not isinstance(values, dict):
+            unknown.append(target); continue
+        for n in names: looks.setdefault(n, {}).update(values)
+    rejected = dmx_apply_many(looks, float(b.get("fade", 0)))
+    applied = {n: [k for k in v if k not in rejected.get(n, ())] for n, v in looks.items()}
+    return jsonify(ok=not unknown, applied={n: ks for n, ks in applied.items() if ks},
+                   rejected=rejected, unknown_targets=unknown), (200 if looks or not unknown else 400)
 
 @app.post("/api/fixture/set")
 def api_fixture_set():
@@ -538,25 +1003,33 @@ def api_fixture_set():
 def api_scene_save():
     b = request.json or {}; nm = b.get("name")
     if not nm: return jsonify(ok=False, err="name"), 400
-    snap = {}
-    for name, fx in FIXTURES.get("fixtures", {}).items():
-        ch = fx.get("ch",{})
-        keys = [k for k in ("pan","tilt","dim","strobe","color","gobo","r","g","b","w") if k in ch]
-        if not keys: continue
-        obj = {}
-        for k in keys:
-            idx = fx["start"] + ch[k] - 2
-            if 0 <= idx < 512: obj[k] = DMX_BUF[idx]
-        if obj: snap[name] = obj
-    SCENES[nm] = snap; jsave(SCENES_PATH, SCENES)
-    return jsonify(ok=True, scenes=list(SCENES.keys()))
+    SCENES.capture(nm, DMX.view)
+    return jsonify(ok=True, scenes=SCENES.keys())
 
 @app.post("/api/scene/load")
 def api_scene_load():
     b = request.json or {}; nm = b.get("name")
     if not nm or nm not in SCENES: return jsonify(ok=False, err="unknown scene"), 400
-    for name, vals in SCENES[nm].items(): dmx_apply_fixture(name, vals)
-    return jsonify(ok=True)
+    n = scene_recall([SCENES.get(nm)], float(b.get("fade", 0)))
+    return jsonify(ok=True, channels=n)
+
+@app.post("/api/scene/delete")
+def api_scene_delete():
+    b = request.json or {}; nm = b.get("name")
+    if not nm or nm not in SCENES: return jsonify(ok=False, err="unknown scene"), 400
+    SCENES.delete(nm)
+    return jsonify(ok=True, scenes=SCENES.keys())
+
+@app.get("/api/scenes")
+def api_scenes():
+    return jsonify(scenes=SCENES.keys(), band_presets=BAND_PRESETS.keys(),
+                   stats=dict(SCENE_STATS, scenes=SCENES.stats, band_presets=BAND_PRESETS.stats))
+
+@app.get("/api/scene/export")
+def api_scene_export():
+    """The library as JSON ({name: {fixture: {attr: value}}}); `?lib=band_presets` for the band presets."""
+    lib = BAND_PRESETS if request.args.get("lib") == "band_presets" else SCENES
+    return jsonify(lib.export())
 
 # -------- Rehearsal / Aim & Store (offsets) --------
 @app.post("/api/rehearsal")
@@ -569,7 +1042,7 @@ def api_rehearsal():
         for k in ("pan_off","tilt_off","color_fix","gobo_fix"):
             if k in b: rec[k] = b[k]
         REHEARSAL[name] = rec
-        jsave(f"{BASE}/data/rehearsal_positions.json", REHEARSAL)
+        jsave(f"{DATA}/rehearsal_positions.json", REHEARSAL)
         return jsonify(ok=True, stored={name: rec})
     if "target" in b:
         STATE["band_target"] = b["target"]
@@ -583,23 +1056,10 @@ def api_preset_apply_group():
     if not group or not name: return jsonify(ok=False, err="group/name"), 400
     p = (PRESETS.get("group_presets", {}).get(group, {}) or {}).get(name)
     if not p: return jsonify(ok=False, err="unknown preset"), 404
-    for fxn in FIXTURES["groups"].get(group, []):
-        dmx_apply_fixture(fxn, p)
+    dmx_apply_many({fxn: p for fxn in FIXTURES["groups"].get(group, [])}, float(b.get("fade", 0)))
     return jsonify(ok=True)
 
 # -------- Band outlight presets (Aim & Store per target) --------
-def snapshot_all_relevant():
-    snap = {}
-    for name, fx in FIXTURES.get("fixtures", {}).items():
-        ch = fx.get("ch",{})
-        keys = [k for k in ("pan","tilt","dim","strobe","color","gobo","r","g","b","w") if k in ch]
-        if not keys: continue
-        obj = {}
-        for k in keys:
-            idx = fx["start"] + ch[k] - 2
-            if 0 <= idx < 512: obj[k] = DMX_BUF[idx]
-        if obj: snap[name] = obj
-    return snap
 
 @app.post("/api/band/preset/save")
 def api_band_preset_save():
@@ -607,8 +1067,7 @@ def api_band_preset_save():
     target = b.get("target")
     if target not in PRESETS.get("band_targets", []):
         return jsonify(ok=False, err="unknown target"), 400
-    BAND_PRESETS[target] = snapshot_all_relevant()
-    jsave(BAND_PRESETS_PATH, BAND_PRESETS)
+    BAND_PRESETS.capture(target, DMX.view)
     return jsonify(ok=True, saved_target=target)
 
 @app.post("/api/band/preset/load")
@@ -616,8 +1075,7 @@ def api_band_preset_load():
     b = request.json or {}
     target = b.get("target")
     if target not in BAND_PRESETS: return jsonify(ok=False, err="no data"), 404
-    for fxn, vals in BAND_PRESETS[target].items():
-        dmx_apply_fixture(fxn, vals)
+    scene_recall([BAND_PRESETS.get(target)], float(b.get("fade", CFG.get("band_fade_s", 1.5))))
     return jsonify(ok=True, loaded_target=target)
 
 # -------- Force bridge (AUTO / A / B / C) --------
@@ -632,15 +1090,89 @@ def api_force():
         pass
     return jsonify(ok=True, forwarded=setv)
 
+# -------- Output stats --------
+@app.get("/api/dmx/stats")
+def api_dmx_stats():
+    return jsonify(dict(DMX.stats, universes=PATCH.universes, rejected=PATCH.rejected, fades=DMX.fades.stats,
+                        color_match=COLOR_MATCH.stats(), timers=TIMERS.stats))
+
+@app.get("/api/wled/stats")
+def api_wled_stats():
+    return jsonify(devices=WLED.stats(), realtime=WLED_RT.stats if WLED_RT else None)
+
+@app.get("/api/audio")
+def api_audio():
+    if not AUDIO: return jsonify(enabled=False)
+    return jsonify(enabled=True, features=AUDIO.features(), stats=AUDIO.stats)
+
+# -------- Metrics / profiler --------
+def _gauges():
+    out = stats_gauges("dmx", DMX.stats) + stats_gauges("fades", DMX.fades.stats) \
+        + stats_gauges("effects", EFFECTS.stats) + stats_gauges("timers", TIMERS.stats) \
+        + stats_gauges("cues", CUES.stats) + stats_gauges("state_feed", STATE_FEED.stats) \
+        + stats_gauges("sse", SSE_STATS) + stats_gauges("midi_link", LINK_STATS) \
+        + stats_gauges("scenes", SCENE_STATS)
+    for dev, st in WLED.stats().items(): out += stats_gauges("wled", st, device=dev)
+    if WLED_RT: out += stats_gauges("wled_rt", WLED_RT.stats)
+    if AUDIO:   out += stats_gauges("audio", AUDIO.stats)
+    for task, st in ENGINE.stats().items(): out += stats_gauges("engine", st, task=task)
+    for name, st in RENDER.stats().items(): out += stats_gauges("render", st, output=name)
+    out += stats_gauges("config", CONFIG.stats)
+    return out
+METRICS.gauge(_gauges)
+
+@app.get("/api/config")
+def api_config():
+    """Loaded config files: version (reloads), load time and the last rejected change per file."""
+    return jsonify(files=CONFIG.status(), stats=CONFIG.stats)
+
+@app.post("/api/config/reload")
+def api_config_reload():
+    return jsonify(ok=True, swapped=CONFIG.check(), files=CONFIG.status())
+
+@app.get("/api/engine")
+def api_engine():
+    """Scheduler stats per task and the beat clock; `?reset=1` clears the max values."""
+    if request.args.get("reset"): ENGINE.reset_max()
+    return jsonify(tasks=ENGINE.stats(), outputs=RENDER.stats(), clock=BEAT.status(),
+                   beat=round(beat_clock(time.monotonic()), 3))
+
+@app.get("/api/metrics")
+def api_metrics():
+    return Response(METRICS.prometheus(), mimetype="text/plain; version=0.0.4")
+
+@app.get("/api/metrics/errors")
+def api_metrics_errors():
+    return jsonify(METRICS.last_error)
+
+@app.get("/api/metrics/profiler")
+def api_profiler():
+    if request.args.get("format") == "collapsed":
+        return Response(PROFILER.collapsed(), mimetype="text/plain")
+    return jsonify(PROFILER.report(int(request.args.get("top", 25))))
+
+@app.post("/api/metrics/profiler")
+def api_profiler_toggle():
+    """{"on": true, "interval_ms": 5, "threads": ["dmx-output", ...]} / {"on": false}"""
+    b = request.json or {}
+    if b.get("on"): PROFILER.start(float(b.get("interval_ms", 5)) / 1000.0, b.get("threads"), reset=b.get("reset", True))
+    else:           PROFILER.stop()
+    return jsonify(PROFILER.report(10))
+
 # -------- MIDI logging / learn hook --------
+MIDI_METRICS = {}   # device → laatste latency/reconnect-rapport van de bridge
+
 @app.post("/api/midi/log")
 def api_midi_log():
     b = request.json or {}
+    if "metrics" in b and b.get("device"):
+        MIDI_METRICS[b["device"]] = b["metrics"]
     return jsonify(ok=True, seen=b)
 
 # -------- Safe shutdown --------
 @app.post("/api/safe_shutdown")
 def api_safe_shutdown():
+    flush_state()
     os.system(f"bash {BASE}/scripts/safe_shutdown.sh &")
     return jsonify(ok=True)
 
@@ -649,6 +1181,113 @@ def api_safe_shutdown():
 def assets(p):
     return send_from_directory("web/assets", p)
 
+# -------- MIDI link (persistent local UDP channel from the MIDI bridges) --------
+LINK_CFG = CFG.get("midi_link") or {}
+LINK_STATS = {"datagrams": 0, "messages": 0, "errors": 0, "ms_last": 0.0, "ms_max": 0.0, "state_pushes": 0}
+LINK_SUBS = {}      # addr → (keys (None = alles), vervaltijd)
+LINK_NET = {"/api/force"}   # routes die zelf een netwerk-request doen: niet op de link-thread
+LINK_POOL = ThreadPoolExecutor(1, thread_name_prefix="link-net")   # één worker: volgorde blijft behouden
+
+def link_dispatch(path, body):
+    """Run one batched message through the normal Flask route, without HTTP."""
+    with app.test_request_context(path, method="POST", json=body):
+        app.full_dispatch_request()
+
+def link_dispatch_net(path, body):
+    try: link_dispatch(path, body)
+    except Exception: LINK_STATS["errors"] += 1
+
+def link_loop(sock):
+    while True:
+        data, addr = sock.recvfrom(65535)
+        t0 = time.perf_counter()
+        LINK_STATS["datagrams"] += 1
+        try:
+            msg = json.loads(data)
+            if "sub" in msg:   # bridge vraagt (of vernieuwt) state-push; nieuw → meteen snapshot
+                keys = set(msg["sub"]) if msg["sub"] else None
+                if addr not in LINK_SUBS: link_push(sock, addr, keys, STATE_FEED.snapshot()[1], True)
+                LINK_SUBS[addr] = (keys, time.monotonic() + 15.0)
+                continue
+            batch = msg["b"]
+        except Exception:
+            LINK_STATS["errors"] += 1; continue
+        for path, body in batch:
+            try:
+                if not str(path).startswith("/api/"): raise ValueError(path)
+                if path in LINK_NET: LINK_POOL.submit(link_dispatch_net, path, body)
+                else: link_dispatch(path, body)
+                LINK_STATS["messages"] += 1
+            except Exception:
+                LINK_STATS["errors"] += 1
+        LINK_STATS["ms_last"] = ms = (time.perf_counter() - t0) * 1000.0
+        LINK_STATS["ms_max"] = max(LINK_STATS["ms_max"], ms)
+
+def link_push(sock, addr, keys, values, full):
+    part = {k: v for k, v in values.items() if keys is None or k in keys}
+    if not part and not full: return
+    try:
+        sock.sendto(json.dumps({"state": part, "full": full}).encode(), addr)
+        LINK_STATS["state_pushes"] += 1
+    except OSError:
+        LINK_STATS["errors"] += 1
+
+def link_push_loop(sock):
+    """Forward STATE_FEED diffs to subscribed bridges (filtered on their keys)."""
+    v = STATE_FEED.version
+    while not STATE_FEED.closed:
+        diffs = STATE_FEED.since(v, 5.0)
+        now = time.monotonic()
+        for addr, (_, expires) in list(LINK_SUBS.items()):
+            if expires < now: LINK_SUBS.pop(addr, None)
+        if diffs is None:   # achterstand groter dan de backlog: iedereen opnieuw een snapshot
+            v, snap = STATE_FEED.snapshot()
+            for addr, (keys, _) in list(LINK_SUBS.items()): link_push(sock, addr, keys, snap, True)
+            continue
+        if not diffs: continue
+        v = diffs[-1][0]
+        changed = {}
+        for _, d, _ in diffs: changed.update(d["set"])
+        for addr, (keys, _) in list(LINK_SUBS.items()): link_push(sock, addr, keys, changed, False)
+
+if LINK_CFG.get("enabled", True):
+    try:
+        _LINK_SOCK = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        _LINK_SOCK.bind((LINK_CFG.get("host", "127.0.0.1"), LINK_CFG.get("port", 5005)))
+        threading.Thread(target=link_loop, args=(_LINK_SOCK,), name="midi-link", daemon=True).start()
+        threading.Thread(target=link_push_loop, args=(_LINK_SOCK,), name="midi-link-push", daemon=True).start()
+    except OSError:
+        pass   # poort bezet (bv. tweede instantie): geen link, de HTTP-routes werken gewoon
+
+@app.get("/api/midi/link")
+def api_midi_link():
+    return jsonify(link=LINK_STATS, bridges=MIDI_METRICS)
+
 # -------- Run --------
+def serve():
+    """Production server: waitress when installed, else werkzeug's threaded server (no debugger/reloader).
+    Every open SSE stream holds a worker thread, so the waitress pool is sized for the tablets."""
+    scfg = CFG.get("server") or {}
+    host, port, engine = scfg.get("host", "0.0.0.0"), int(scfg.get("port", 5000)), scfg.get("engine", "auto")
+    if engine in ("auto", "waitress"):
+        try:
+            from waitress import serve as waitress_serve
+        except ImportError:
+            if engine == "waitress": raise
+        else:
+            return waitress_serve(app, host=host, port=port, threads=int(scfg.get("threads", 24)), ident="lightshow")
+    from werkzeug.serving import make_server
+    make_server(host, port, app, threaded=True).serve_forever()
+
+def shutdown(*_):
+    """SIGTERM (systemd stop): save STATE right away (atexit is only the backup), then end the
+    SSE streams, so waitress's worker threads are free and the process exits well within TimeoutStopSec."""
+    try: flush_state()
+    except Exception: pass
+    STATE_FEED.close()
+    sys.exit(0)
+
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000)
\ No newline at end of file
+    signal.signal(signal.SIGTERM, shutdown)
+    if "--dev" in sys.argv: app.run(host="0.0.0.0", port=5000, debug=True, use_reloader=False)
+    else: serve()
\ No newline at end of file
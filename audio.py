@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""Streaming audio analysis: FFT band energies, onsets, beat tracking and BPM.
+
+The worker reads fixed-size chunks from a source (sound card, WAV file or raw s16le mono
+PCM on stdin), runs AudioAnalyzer.process on each and publishes a compact feature dict
+that the engine reads without locking (the dict is swapped, never mutated).
+
+Offline benchmark:  python audio.py song.wav        (or: ... | python audio.py -)
+"""
+import sys, json, time, wave, threading
+from collections import deque
+import numpy as np
+
+BANDS = {"bass": (20, 150), "mid": (150, 2000), "high": (2000, 10000)}
+
+class AudioAnalyzer:
+    def __init__(self, rate=44100, chunk=1024, bpm_range=(70, 180), window_s=6.0):
+        self.rate, self.chunk = rate, chunk
+        self.fps = rate / chunk                                   # analysevensters per seconde
+        self.win = np.hanning(chunk).astype(np.float32)
+        freqs = np.fft.rfftfreq(chunk, 1.0 / rate)
+        self.bands = {k: (freqs >= lo) & (freqs < hi) for k, (lo, hi) in BANDS.items()}
+        self.peak = {k: 1e-6 for k in BANDS}                      # AGC per band
+        self.prev_mag = None
+        self.flux = deque(maxlen=int(window_s * self.fps))
+        self.lags = np.arange(int(60 * self.fps / bpm_range[1]), int(60 * self.fps / bpm_range[0]) + 1)
+        self.t = 0.0                                              # stream time (s)
+        self.last_onset = -1.0
+        self.bpm, self.period = 120.0, 0.5
+        self.next_beat, self.beats = 0.0, 0
+        self.energy = 0.0
+        self.features = self._snapshot(0.0, {k: 0.0 for k in BANDS}, False, False)
+
+    def _snapshot(self, level, bands, onset, beat):
+        return {"t": time.monotonic(), "level": level, **bands, "energy": self.energy, "onset": onset, "beat": beat,
+                "beat_count": self.beats, "bpm": round(self.bpm, 1),
+                "beat_phase": float(np.clip(1.0 - (self.next_beat - self.t) / self.period, 0.0, 1.0))}
+
+    def _tempo(self):
+        env = np.asarray(self.flux, dtype=np.float32)
+        env = env - env.mean()
+        if len(env) < self.lags[-1] * 2 or not env.any(): return
+        ac = np.array([np.dot(env[:-l], env[l:]) for l in self.lags])
+        bpms = 60 * self.fps / self.lags
+        ac *= np.exp(-0.5 * (np.log2(bpms / 120.0) / 0.6) ** 2)    # voorkeur rond 120 tegen octaaffouten
+        i = int(np.argmax(ac))
+        if ac[i] <= 0: return
+        lag = float(self.lags[i])
+        if 0 < i < len(ac) - 1:                                   # parabolische interpolatie
+            a, b, c = ac[i - 1], ac[i], ac[i + 1]
+            d = a - 2 * b + c
+            if d: lag += 0.5 * (a - c) / d
+        self.bpm = float(60 * self.fps / lag)
+        self.period = 60.0 / self.bpm
+
+    def process(self, samples):
+        """Analyse one chunk of mono float32 samples in -1..1 and return the feature dict."""
+        x = samples[:self.chunk]
+        if len(x) < self.chunk: x = np.pad(x, (0, self.chunk - len(x)))
+        self.t += self.chunk / self.rate
+        mag = np.abs(np.fft.rfft(x * self.win))
+        bands = {}
+        for k, m in self.bands.items():
+            e = float(np.sqrt(np.mean(mag[m] ** 2)))
+            self.peak[k] = max(e, self.peak[k] * 0.9995)
+            bands[k] = e / self.peak[k]
+        level = float(np.sqrt(np.mean(x * x)))
+        self.energy += (0.6 * bands["bass"] + 0.3 * bands["mid"] + 0.1 * bands["high"] - self.energy) * 0.02
+
+        logm = np.log1p(mag)
+        fl = 0.0 if self.prev_mag is None else float(np.maximum(logm - self.prev_mag, 0).sum())
+        self.prev_mag = logm
+        hist = np.asarray(self.flux, dtype=np.float32) if self.flux else None
+        self.flux.append(fl)
+        onset = bool(hist is not None and len(hist) > self.fps / 2 and fl > hist.mean() + 1.5 * hist.std()
+                     and self.t - self.last_onset > 0.1)
+        if onset: self.last_onset = self.t
+        if len(self.flux) % max(1, int(self.fps / 2)) == 0: self._tempo()
+
+        # beat tracking: voorspelde beat, onsets dichtbij de voorspelling zetten de fase bij
+        beat, tol = False, 0.2 * self.period
+        if onset and abs(self.t - self.next_beat) < tol or self.next_beat == 0.0 and onset:
+            beat, self.next_beat = True, self.t + self.period
+        elif self.t >= self.next_beat + tol and self.next_beat:
+            beat, self.next_beat = True, self.next_beat + self.period     # flywheel
+            while self.next_beat < self.t: self.next_beat += self.period
+        if beat: self.beats += 1
+        self.features = self._snapshot(level, bands, onset, beat)
+        return self.features
+
+# ---------- Sources (chunks of float32 mono) ----------
+def _pcm16(raw, channels):
+    x = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+    return x.reshape(-1, channels).mean(axis=1) if channels > 1 else x
+
+def wav_chunks(path, chunk, realtime=False):
+    with wave.open(path, "rb") as w:
+        if w.getsampwidth() != 2: raise ValueError("only 16-bit PCM WAV is supported")
+        ch, rate = w.getnchannels(), w.getframerate()
+        while True:
+            raw = w.readframes(chunk)
+            if not raw: return
+            if realtime: time.sleep(chunk / rate)
+            yield _pcm16(raw, ch)
+
+def stdin_chunks(chunk):
+    rd = sys.stdin.buffer
+    while True:
+        raw = rd.read(chunk * 2)
+        if not raw: return
+        yield _pcm16(raw, 1)
+
+def device_chunks(chunk, rate, device=None):
+    import sounddevice as sd                                      # optioneel: alleen voor live input
+    with sd.InputStream(samplerate=rate, channels=1, dtype="float32", blocksize=chunk, device=device) as st:
+        while True:
+            yield st.read(chunk)[0][:, 0]
+
+def open_source(cfg):
+    """`source`: "stdin", a .wav path, "default" (the default input device) or a sound card:
+    its index or (part of) its name, e.g. "USB"; an unknown card raises ValueError."""
+    src, chunk, rate = cfg.get("source", "default"), int(cfg.get("chunk", 1024)), int(cfg.get("rate", 44100))
+    if src == "stdin": return stdin_chunks(chunk)
+    if str(src).endswith(".wav"): return wav_chunks(src, chunk, realtime=True)
+    device = None if src == "default" else src
+    if device is not None:
+        import sounddevice as sd
+        sd.query_devices(device, "input")                        # ValueError bij een onbekende kaart
+    return device_chunks(chunk, rate, device)
+
+class AudioWorker:
+    """Runs the analyzer on its own thread; `features()` returns the latest snapshot or None when stale."""
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.analyzer = AudioAnalyzer(int(cfg.get("rate", 44100)), int(cfg.get("chunk", 1024)))
+        self.stats = {"chunks": 0, "errors": 0, "proc_ms_avg": 0.0, "proc_ms_max": 0.0, "running": False, "error": None}
+        self._thread = None
+
+    def start(self):
+        if self._thread: return
+        self._thread = threading.Thread(target=self._run, name="audio", daemon=True)
+        self._thread.start()
+
+    def features(self, max_age=1.0):
+        f = self.analyzer.features
+        return f if self.stats["running"] and time.monotonic() - f["t"] < max_age else None
+
+    def _run(self):
+        while True:
+            try:
+                self.stats["running"] = True
+                for x in open_source(self.cfg):
+                    t0 = time.perf_counter()
+                    self.analyzer.process(x)
+                    ms = (time.perf_counter() - t0) * 1000.0
+                    st = self.stats
+                    st["chunks"] += 1; st["proc_ms_max"] = max(st["proc_ms_max"], ms)
+                    st["proc_ms_avg"] += (ms - st["proc_ms_avg"]) * 0.05
+            except ImportError as e:                              # sounddevice niet geïnstalleerd: opnieuw proberen helpt niet
+                self.stats.update(running=False, errors=self.stats["errors"] + 1, error=f"{e}; pip install sounddevice")
+                print(f"audio: {self.stats['error']}, audio analysis off", file=sys.stderr)
+                return
+            except Exception as e:
+                self.stats["errors"] += 1; self.stats["error"] = f"{type(e).__name__}: {e}"
+            self.stats["running"] = False
+            time.sleep(2.0)                                       # bron weg (USB eruit) of einde bestand: later opnieuw
+
+def bench(chunks, rate=44100, chunk=1024):
+    """Run the analyzer as fast as possible over `chunks`; returns latency stats and the final features."""
+    an, lat = AudioAnalyzer(rate, chunk), []
+    for x in chunks:
+        t0 = time.perf_counter(); an.process(x); lat.append((time.perf_counter() - t0) * 1000.0)
+    lat = np.asarray(lat or [0.0])
+    return {"chunks": len(lat), "ms_avg": float(lat.mean()), "ms_p95": float(np.percentile(lat, 95)),
+            "ms_max": float(lat.max()), "budget_ms": 1000.0 * chunk / rate, "bpm": an.features["bpm"],
+            "beats": an.beats}
+
+if __name__ == "__main__":
+    arg = sys.argv[1] if len(sys.argv) > 1 else "-"
+    if arg == "-":
+        print(json.dumps(bench(stdin_chunks(1024))))
+    else:
+        with wave.open(arg, "rb") as w: rate = w.getframerate()
+        print(json.dumps(bench(wav_chunks(arg, 1024), rate=rate)))
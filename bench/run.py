@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""Offline benchmark suite for the hot paths of app.py.
+
+    python bench/run.py                         # all benchmarks → bench/results/<host>-<time>.json
+    python bench/run.py --quick                 # fewer iterations (smoke run)
+    python bench/run.py --baseline bench/results/pi4-before-gig.json --tolerance 0.25
+    python bench/run.py --only dmx_apply_fixture http_levels
+
+The app is imported with $LIGHTSHOW_SETTINGS selecting the null DMX backend and no WLED,
+realtime, audio or MIDI link, and $LIGHTSHOW_DATA pointing at a temp dir, so no frame reaches
+the rig and the real data/ is never opened, even on the show machine.
+With --baseline, every benchmark whose time per op got more than `tolerance` slower is
+reported and the exit code is 1.
+"""
+import os, sys, json, time, socket, argparse, platform, tempfile, threading, statistics
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# alles wat de app bij import opent: null-DMX, geen WLED/realtime/audio/MIDI-link
+OFFLINE = {"dmx_output": {"backend": "none"}, "wled": {}, "wled_realtime": {"enabled": False},
+           "audio": {"enabled": False}, "midi_link": {"enabled": False}}
+
+def load_app():
+    # vóór de import: de app start bij import al zijn output-threads en opent data/
+    os.environ["LIGHTSHOW_DATA"] = tempfile.mkdtemp(prefix="lightshow-bench-")
+    os.environ["LIGHTSHOW_SETTINGS"] = json.dumps(OFFLINE)
+    import app
+    app.STATE["mode"] = "manual"          # engine-thread zo stil mogelijk tijdens de metingen
+    return app
+
+def timeit(fn, n, repeat=5):
+    """Best-of-`repeat` and median time per call (µs) over n calls."""
+    n, runs = max(1, int(n)), []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(n): fn()
+        runs.append((time.perf_counter() - t0) / n * 1e6)
+    return {"n": n, "repeat": repeat, "us_per_op": round(statistics.median(runs), 3),
+            "us_best": round(min(runs), 3), "ops_per_s": round(1e6 / statistics.median(runs), 1)}
+
+def pct(lat, p):
+    lat = sorted(lat)
+    return lat[min(len(lat) - 1, int(round(p / 100.0 * (len(lat) - 1))))]
+
+# ---------- Benchmarks ----------
+def b_dmx_apply_fixture(app, k):
+    names = [n for n in app.PATCH.fixtures if app.FIXTURES["fixtures"][n].get("match_color")]
+    looks = [{"hex": h, "dim": 200, "pan": 128, "tilt": 90} for h in ("#FF0000", "#00FF88", "#0048FF", "#FFE6CC")]
+    i = [0]
+    def op():
+        i[0] += 1
+        app.dmx_apply_fixture(names[i[0] % len(names)], looks[i[0] % len(looks)])
+    return dict(timeit(op, 2000 * k), fixtures=len(names))
+
+def b_group_fader(app, k):
+    groups = [g for g in app.PATCH.groups if "dim" in app.PATCH.groups[g]]
+    i = [0]
+    def op():
+        i[0] += 1
+        app.dmx_group_set(groups[i[0] % len(groups)], "dim", i[0] & 0xFF)
+    return dict(timeit(op, 5000 * k), groups=len(groups))
+
+def b_scene_recall(app, k):
+    """Masked diff recall: identical frame (nothing to write) and two alternating scenes."""
+    lib = app.SCENES
+    app.dmx_group_set(next(iter(app.PATCH.groups)), "dim", 10); lib.capture("bench_a", app.DMX.view)
+    app.dmx_group_set(next(iter(app.PATCH.groups)), "dim", 250); lib.capture("bench_b", app.DMX.view)
+    a, b, i = lib.get("bench_a"), lib.get("bench_b"), [0]
+    def alt():
+        i[0] += 1
+        app.scene_recall([a if i[0] & 1 else b])
+    return {"unchanged": timeit(lambda: app.scene_recall([b]), 2000 * k), "alternate": timeit(alt, 2000 * k),
+            "merge2": timeit(lambda: app.scene_recall([a, b]), 2000 * k)}
+
+def b_scene_save_load(app, k):
+    c = app.app.test_client()
+    save = timeit(lambda: c.post("/api/scene/save", json={"name": "bench"}), 100 * k)
+    load = timeit(lambda: c.post("/api/scene/load", json={"name": "bench"}), 300 * k)
+    fade = timeit(lambda: c.post("/api/scene/load", json={"name": "bench", "fade": 1.0}), 300 * k)
+    return {"save": save, "load": load, "load_fade": fade}
+
+def b_engine_tick(app, k):
+    st = app.STATE
+    out = {}
+    for mode, fn, wled in (("ai", app.ai_tick, app.ai_wled), ("band", app.band_tick, app.band_wled)):
+        st["mode"] = mode; st["ai_enabled"] = True
+        for name, tick, group in ((mode, fn, f"{mode}_dmx"), (mode + "_wled", wled, f"{mode}_wled")):
+            # invalidate: anders meet je het "niets veranderd"-pad van de render graph; dat apart
+            out[name] = timeit(lambda: (app.RENDER.invalidate(group), tick()), 500 * k)
+            tick(); out[name + "_skip"] = timeit(tick, 500 * k)
+    st["mode"] = "manual"
+    st["ai_sub"] = "psytrance"; app.fx_sync()
+    import numpy as np
+    frame = np.zeros(len(app.DMX.buf), dtype=np.uint8)
+    out["effects_render"] = dict(timeit(lambda: app.EFFECTS.render(frame, time.monotonic()), 2000 * k),
+                                 channels=app.EFFECTS.stats["channels"])
+    return out
+
+def _serve(app):
+    import logging
+    from werkzeug.serving import make_server
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)   # geen regel per request
+    s = socket.socket(); s.bind(("127.0.0.1", 0)); port = s.getsockname()[1]; s.close()
+    srv = make_server("127.0.0.1", port, app.app, threaded=True)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv, f"http://127.0.0.1:{port}"
+
+def _load(url, bodies, clients, per_client):
+    import requests
+    def worker(ci):
+        s, lat = requests.Session(), []
+        for j in range(max(1, int(per_client))):
+            t0 = time.perf_counter()
+            s.post(url, json=bodies[(ci + j) % len(bodies)]).close()
+            lat.append((time.perf_counter() - t0) * 1000.0)
+        return lat
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(clients) as ex: lat = [x for r in ex.map(worker, range(clients)) for x in r]
+    wall = time.perf_counter() - t0
+    return {"clients": clients, "requests": len(lat), "req_per_s": round(len(lat) / wall, 1),
+            "ms_p50": round(pct(lat, 50), 3), "ms_p95": round(pct(lat, 95), 3),
+            "ms_p99": round(pct(lat, 99), 3), "ms_max": round(max(lat), 3), "us_per_op": round(pct(lat, 50) * 1000, 1)}
+
+def b_http_levels(app, k):
+    srv, base = _serve(app)
+    try:
+        bodies = [{"control": c, "value": v} for c in ("par_big_all", "par_small_all", "moving_par_lr") for v in (0, 64, 127)]
+        return {f"c{n}": _load(base + "/api/levels", bodies, n, 100 * k) for n in (1, 4, 8)}
+    finally: srv.shutdown()
+
+def b_http_fixture_set(app, k):
+    srv, base = _serve(app)
+    try:
+        names = list(app.PATCH.fixtures)
+        bodies = [{"name": n, "values": {"dim": 180, "hex": "#FF6A00"}} for n in names]
+        return {f"c{n}": _load(base + "/api/fixture/set", bodies, n, 100 * k) for n in (1, 4, 8)}
+    finally: srv.shutdown()
+
+BENCHES = {
+    "dmx_apply_fixture": b_dmx_apply_fixture,
+    "group_fader": b_group_fader,
+    "scene_recall": b_scene_recall,
+    "scene_save_load": b_scene_save_load,
+    "engine_tick": b_engine_tick,
+    "http_levels": b_http_levels,
+    "http_fixture_set": b_http_fixture_set,
+}
+
+# ---------- Baseline compare ----------
+def flatten(d, prefix=""):
+    """{"a": {"b": {"us_per_op": x}}} → {"a.b": x}"""
+    out = {}
+    for key, v in d.items():
+        if isinstance(v, dict):
+            if "us_per_op" in v: out[prefix + key] = v["us_per_op"]
+            out.update(flatten({k2: v2 for k2, v2 in v.items() if isinstance(v2, dict)}, f"{prefix}{key}."))
+    return out
+
+def compare(results, baseline, tolerance):
+    cur, base = flatten(results), flatten(baseline)
+    regressions = []
+    for key, v in cur.items():
+        if key in base and base[key] > 0 and v > base[key] * (1 + tolerance):
+            regressions.append({"bench": key, "baseline_us": base[key], "now_us": v, "slower": round(v / base[key] - 1, 3)})
+    return regressions
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    ap.add_argument("--only", nargs="*", choices=sorted(BENCHES))
+    ap.add_argument("--quick", action="store_true")
+    ap.add_argument("--out")
+    ap.add_argument("--baseline")
+    ap.add_argument("--tolerance", type=float, default=0.25)
+    a = ap.parse_args()
+    k = 1 if not a.quick else 0.1
+    app = load_app()
+    time.sleep(0.2)                        # achtergrondthreads laten opstarten
+    results = {}
+    for name in a.only or BENCHES:
+        t0 = time.perf_counter()
+        results[name] = BENCHES[name](app, k)
+        print(f"{name:24s} {time.perf_counter() - t0:6.2f}s  {json.dumps(results[name])[:140]}", file=sys.stderr)
+    doc = {"host": socket.gethostname(), "platform": platform.platform(), "python": platform.python_version(),
+           "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "quick": a.quick, "results": results}
+    if a.baseline:
+        with open(a.baseline) as f: doc["regressions"] = compare(results, json.load(f)["results"], a.tolerance)
+    out = a.out or f"{ROOT}/bench/results/{doc['host']}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f: json.dump(doc, f, indent=2)
+    print(out)
+    for r in doc.get("regressions", []):
+        print(f"REGRESSION {r['bench']}: {r['baseline_us']} → {r['now_us']} µs/op (+{r['slower']:.0%})", file=sys.stderr)
+    return 1 if doc.get("regressions") else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Nearest-colour lookup for colour-wheel fixtures: per-wheel RGB lookup tables built once at load.
+
+Every distinct wheel (fixtures with the same map share one) gets a quantized RGB cube
+(`lut_bits` per channel) that stores the index of the nearest wheel slot, so a lookup is one
+array read. A cell only gets a slot when all eight of its corner colours share that winner;
+cells on a boundary between slots fall back to the exact scan, so the answer never depends
+on the quantization. Distance is squared RGB (default) or CIE76 ΔE in Lab ("lab", perceptual).
+Hex → DMX results are memoized in an LRU cache on top.
+"""
+from functools import lru_cache
+import numpy as np
+
+@lru_cache(maxsize=1024)
+def hex_to_rgb(hexv):
+    return int(hexv[1:3],16), int(hexv[3:5],16), int(hexv[5:7],16)
+
+def rgb_to_lab(rgb):
+    """sRGB (..., 3) in 0..255 → CIE Lab (D65)."""
+    c = np.asarray(rgb, dtype=np.float64) / 255.0
+    c = np.where(c > 0.04045, ((c + 0.055) / 1.055) ** 2.4, c / 12.92)
+    xyz = c @ np.array([[0.4124, 0.2126, 0.0193], [0.3576, 0.7152, 0.1192], [0.1805, 0.0722, 0.9505]])
+    xyz /= (0.95047, 1.0, 1.08883)
+    f = np.where(xyz > 216 / 24389, np.cbrt(xyz), (24389 / 27 * xyz + 16) / 116)
+    return np.stack([116 * f[..., 1] - 16, 500 * (f[..., 0] - f[..., 1]), 200 * (f[..., 1] - f[..., 2])], axis=-1)
+
+class ColorIndex:
+    """Nearest of `refs` [(hex, dmx_value)]; ties go to the first entry, like the old linear scan."""
+    MIXED = 255                                                   # LUT-cel op een grens: exact zoeken
+
+    def __init__(self, refs, metric="rgb", lut_bits=5):
+        self.values = np.array([v for _, v in refs], dtype=np.int16)
+        self.metric, self.bits = metric, int(lut_bits)
+        self._ref = self._space(np.array([hex_to_rgb(h) for h, _ in refs], dtype=np.float64))
+        step = 1 << (8 - self.bits)
+        n = 256 // step
+        axis = np.stack([np.arange(0, 256, step), np.arange(step - 1, 256, step)], axis=1).ravel()   # hoeken per cel
+        gb = np.stack(np.meshgrid(axis, axis, indexing="ij"), axis=-1).reshape(-1, 2)
+        win = np.empty((2 * n,) * 3, dtype=np.uint8)
+        for i, r in enumerate(axis):                              # per R-vlak: geheugen blijft ~1 MB i.p.v. ~170 MB
+            win[i] = self._nearest(np.column_stack([np.full(len(gb), r), gb])).reshape(2 * n, 2 * n)
+        win = win.reshape(n, 2, n, 2, n, 2).transpose(0, 2, 4, 1, 3, 5).reshape(n, n, n, 8)
+        same = (win == win[..., :1]).all(axis=-1)
+        self.lut = np.where(same, win[..., 0], self.MIXED).astype(np.uint8)
+        self.mixed = int((~same).sum())
+
+    def _space(self, rgb):
+        return rgb_to_lab(rgb) if self.metric == "lab" else rgb
+
+    def _nearest(self, rgb):
+        d = self._space(np.asarray(rgb, dtype=np.float64))[..., None, :] - self._ref
+        return np.argmin((d * d).sum(axis=-1), axis=-1)
+
+    def lookup(self, hexv):
+        r, g, b = hex_to_rgb(hexv)
+        s = 8 - self.bits
+        i = self.lut[r >> s, g >> s, b >> s]
+        return self.exact(hexv) if i == self.MIXED else int(self.values[i])
+
+    def exact(self, hexv):
+        """Unquantized nearest (the LUT's fallback for boundary cells)."""
+        return int(self.values[self._nearest(hex_to_rgb(hexv))])
+
+class ColorMatcher:
+    """Per-fixture wheel indexes from fixtures_full.json: `match(name, hex)` → (attr, dmx) or None."""
+    def __init__(self, fixtures_cfg, metric="rgb", lut_bits=5, cache_size=512):
+        pal = (fixtures_cfg or {}).get("color_palettes", {})
+        shared, self.wheels = {}, {}
+        for name, fx in (fixtures_cfg or {}).get("fixtures", {}).items():
+            mc = fx.get("match_color") or {}
+            if "wheel" in mc:
+                kind, refs = "wheel", [(pal.get(c, "#FFFFFF"), v) for c, v in mc["wheel"]["map"].items()]
+            elif "wheel_combo" in mc:
+                kind, refs = "wheel_combo", [(pal.get(c.split("+")[0], "#FFFFFF"), v) for c, v in mc["wheel_combo"]["map"].items()]
+            else: continue
+            if not refs: continue
+            key = tuple(refs)
+            if key not in shared: shared[key] = ColorIndex(refs, metric, lut_bits)
+            self.wheels[name] = (kind, shared[key])
+        self.indexes = len(shared)
+        self.mixed_cells = sum(ci.mixed for ci in shared.values())
+        self.match = lru_cache(maxsize=cache_size)(self._match)
+
+    def _match(self, name, hexv):
+        w = self.wheels.get(name)
+        return (w[0], w[1].lookup(hexv)) if w else None
+
+    def stats(self):
+        ci = self.match.cache_info()
+        return {"fixtures": len(self.wheels), "indexes": self.indexes, "mixed_cells": self.mixed_cells, "cache_hits": ci.hits,
+                "cache_misses": ci.misses, "cache_size": ci.currsize}
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Config registry: every config file is parsed, validated and indexed once, then hot-reloaded.
+
+`register(name, file, default, build)` loads the file and runs `build(raw)`, which validates
+it and returns the value the app works with (raising ConfigError on bad content). `check()`
+compares mtime/size of every file and rebuilds the changed ones; the new value is handed to
+the `on_swap` hooks, which replace the app's references (and derived indexes) in one go.
+A file that fails to parse, validate or swap keeps its previous value and records the error,
+so a typo saved mid-rehearsal never takes the output down.
+"""
+import os, json, time, threading
+
+class ConfigError(ValueError):
+    pass
+
+def need(cond, msg):
+    if not cond: raise ConfigError(msg)
+
+def check_clusters(d):
+    """{"clusters": [{"key": ..., "subs": [...]}, ...]}, unique keys."""
+    need(isinstance(d, dict) and isinstance(d.get("clusters"), list), "clusters: list expected")
+    keys = [c.get("key") if isinstance(c, dict) else None for c in d["clusters"]]
+    need(all(isinstance(k, str) and k for k in keys), "clusters: every cluster needs a string key")
+    need(len(set(keys)) == len(keys), "clusters: duplicate key")
+    for c in d["clusters"]:
+        need(isinstance(c.get("subs", []), list), f"clusters.{c['key']}.subs: list expected")
+    return d
+
+def check_fixtures(d):
+    need(isinstance(d, dict) and isinstance(d.get("fixtures"), dict), "fixtures: object expected")
+    for name, fx in d["fixtures"].items():
+        need(isinstance(fx, dict), f"fixtures.{name}: object expected")
+        need(fx.get("start") is None or isinstance(fx["start"], int), f"fixtures.{name}.start: int expected")
+        need(isinstance(fx.get("ch", {}), dict), f"fixtures.{name}.ch: object expected")
+        need(all(isinstance(v, int) for v in fx.get("ch", {}).values()), f"fixtures.{name}.ch: int channels expected")
+    for group, members in d.get("groups", {}).items():
+        need(isinstance(members, list), f"groups.{group}: list expected")
+    return d
+
+def check_object(d):
+    need(isinstance(d, dict), "object expected")
+    return d
+
+class _Entry:
+    __slots__ = ("name", "path", "default", "build", "value", "sig", "version", "error", "loaded", "hooks")
+    def __init__(self, name, path, default, build):
+        self.name, self.path, self.default, self.build = name, path, default, build
+        self.value, self.sig, self.version, self.error, self.loaded, self.hooks = None, None, 0, None, None, []
+
+class ConfigRegistry:
+    def __init__(self, base):
+        self.base = base
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.stats = {"checks": 0, "reloads": 0, "rejected": 0, "check_ms_last": 0.0}
+
+    def _sig(self, path):
+        try:
+            st = os.stat(path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def _build(self, e):
+        with open(e.path) as f: raw = json.load(f)
+        return e.build(raw) if e.build else raw
+
+    def register(self, name, file, default, build=None):
+        """Load + build `file` now; on any error the built default is used and the error kept."""
+        e = _Entry(name, os.path.join(self.base, file), default, build)
+        e.sig = self._sig(e.path)
+        try: e.value = self._build(e)
+        except Exception as ex:
+            e.error = f"{type(ex).__name__}: {ex}" if e.sig else None     # ontbrekend bestand is geen fout
+            e.value = build(default) if build else default
+        e.loaded = time.time()
+        self.entries[name] = e
+        return e.value
+
+    def on_swap(self, name, fn):
+        """fn(new_value) after a successful reload; raising rejects the new version."""
+        self.entries[name].hooks.append(fn)
+
+    def __getitem__(self, name):
+        return self.entries[name].value
+
+    def check(self):
+        """Reload every file whose mtime/size changed; returns the names that were swapped in."""
+        t0 = time.perf_counter()
+        swapped = []
+        with self.lock:
+            for e in self.entries.values():
+                sig = self._sig(e.path)
+                if sig == e.sig or sig is None: continue
+                e.sig = sig
+                try:
+                    value = self._build(e)
+                    for fn in e.hooks: fn(value)
+                except Exception as ex:
+                    e.error = f"{type(ex).__name__}: {ex}"
+                    self.stats["rejected"] += 1
+                    continue
+                e.value, e.error, e.loaded = value, None, time.time()
+                e.version += 1
+                self.stats["reloads"] += 1
+                swapped.append(e.name)
+        self.stats["checks"] += 1
+        self.stats["check_ms_last"] = round((time.perf_counter() - t0) * 1000.0, 3)
+        return swapped
+
+    def status(self):
+        return {n: {"file": os.path.basename(e.path), "version": e.version, "loaded": e.loaded, "error": e.error}
+                for n, e in self.entries.items()}
@@ -0,0 +1 @@
+# pytest: repo-root op sys.path, zodat tests/ de modules (cues, scene_store, ...) direct importeert
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Cue-list playback for band mode: per-song cue stacks fired by a monotonic-clock scheduler.
+
+config/cue_lists.json:
+  {"songs": {"<song>": {"label": "...", "cues": [
+      {"label": "Verse 1", "cluster": "verse", "sub": "rock_tight", "preset": "vox",
+       "scene": "...", "fade": 1.5, "wait": 0.0, "follow": 32.0}, ...]}}}
+
+`wait`   seconds between GO and the cue firing.
+`follow` seconds after the cue fired to auto-GO the next one (absent/null = wait for GO).
+The scheduler has its own thread and heap of deadlines, so timing does not depend on the
+engine tick; `fire` is the app's callback that applies a cue (cluster/preset/scene).
+"""
+import time, heapq, threading
+
+class CuePlayer:
+    def __init__(self, songs, fire, clock=time.monotonic):
+        self.songs = songs or {}
+        self.fire_cb, self.clock = fire, clock
+        self.song, self.index = None, -1
+        self.heap = []                      # (deadline, seq, gen, index)
+        self.gen, self.seq = 0, 0           # gen: verhoogd bij stop/back → oude deadlines vervallen
+        self.paused_left = None             # [(resterend, index)] tijdens pauze
+        self.cond = threading.Condition()
+        self._thread = None
+        self.stats = {"fired": 0, "dropped": 0, "errors": 0, "late_ms_last": 0.0, "late_ms_max": 0.0}
+
+    def cues(self):
+        return (self.songs.get(self.song) or {}).get("cues", [])
+
+    def status(self):
+        cues = self.cues()
+        with self.cond:
+            nxt = min((d for d, _, g, _ in self.heap if g == self.gen), default=None)
+        cur = cues[self.index] if 0 <= self.index < len(cues) else {}
+        return {"song": self.song, "index": self.index, "count": len(cues), "label": cur.get("label"),
+                "next_in": None if nxt is None else round(max(0.0, nxt - self.clock()), 3),
+                "paused": self.paused_left is not None}
+
+    # --- commando's ---
+    def load(self, song):
+        if song not in self.songs: raise KeyError(song)
+        with self.cond:
+            self._clear(); self.song, self.index = song, -1
+
+    def go(self):
+        """Schedule the next cue after its `wait` (a GO during a wait/follow fires that cue now)."""
+        with self.cond:
+            pending = [i for _, _, g, i in sorted(self.heap) if g == self.gen]
+            if pending:
+                self._clear(); self._push(0.0, pending[0]); return True
+            i = self.index + 1
+            if i >= len(self.cues()): return False
+            self._clear(); self._push(float(self.cues()[i].get("wait") or 0.0), i)
+        return True
+
+    def back(self):
+        if not self.cues(): return False            # geen song (of lege song): niets om naar terug te gaan
+        with self.cond:
+            self._clear()
+            self._push(0.0, max(0, self.index - 1))
+        return True
+
+    def goto(self, i):
+        if not 0 <= i < len(self.cues()): raise IndexError(i)
+        with self.cond:
+            self._clear(); self._push(0.0, i)
+
+    def stop(self):
+        with self.cond:
+            self._clear(); self.index = -1
+
+    def pause(self, on=True):
+        """Freeze pending waits/follows; resume reschedules them with the remaining time."""
+        with self.cond:
+            if on and self.paused_left is None:
+                now = self.clock()
+                self.paused_left = [(d - now, i) for d, _, g, i in self.heap if g == self.gen]
+                self._clear(keep_pause=True)
+            elif not on and self.paused_left is not None:
+                left, self.paused_left = self.paused_left, None
+                for dt, i in left: self._push(max(0.0, dt), i)
+
+    # --- scheduler ---
+    def _clear(self, keep_pause=False):
+        self.gen += 1; self.heap.clear()
+        if not keep_pause: self.paused_left = None
+        self.cond.notify()
+
+    def _push(self, delay, i):
+        self.seq += 1
+        heapq.heappush(self.heap, (self.clock() + delay, self.seq, self.gen, i))
+        self.cond.notify()
+
+    def start(self):
+        if self._thread: return
+        self._thread = threading.Thread(target=self._run, name="cues", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try: self._step()
+            except Exception:                           # de scheduler-thread mag nooit stoppen
+                self.stats["errors"] += 1
+
+    def _step(self):
+        with self.cond:
+            while self.heap and self.heap[0][2] != self.gen: heapq.heappop(self.heap)
+            if not self.heap:
+                self.cond.wait(); return
+            wait = self.heap[0][0] - self.clock()
+            if wait > 0.002:
+                self.cond.wait(wait - 0.001); return
+            while self.heap[0][0] > self.clock(): pass      # laatste ms: spin voor ms-nauwkeurigheid
+            deadline, _, _, i = heapq.heappop(self.heap)
+            cues = self.cues()
+            if not 0 <= i < len(cues):                  # song ingekort/verwijderd (config reload) of geen song
+                self.stats["dropped"] += 1; return
+            self.index, cue = i, cues[i]
+            follow = cue.get("follow")
+            if follow is not None and i + 1 < len(cues):
+                self.seq += 1
+                heapq.heappush(self.heap, (deadline + float(follow) + float(cues[i + 1].get("wait") or 0.0),
+                                           self.seq, self.gen, i + 1))
+        late = (self.clock() - deadline) * 1000.0
+        self.stats["fired"] += 1; self.stats["late_ms_last"] = late
+        self.stats["late_ms_max"] = max(self.stats["late_ms_max"], late)
+        try: self.fire_cb(self.song, i, cue)
+        except Exception: self.stats["errors"] += 1
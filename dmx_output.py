@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""DMX output scheduler: writers mark the frame dirty, one thread sends it at a fixed rate.
+
+All universes live in one flat buffer (512 bytes per universe, in patch order) so group
+writes across universes stay a single NumPy assignment. Only universes whose bytes changed
+since their last send go out, plus a keep-alive refresh of every universe.
+
+Run `python dmx_output.py --listen artnet|sacn` for a local stand-in receiver.
+"""
+import sys, time, uuid, socket, struct, threading
+from array import array
+import numpy as np
+from fades import FadeEngine
+
+ARTNET_PORT = 6454
+SACN_PORT = 5568
+
+# ---------- Backends ----------
+class OlaBackend:
+    """Sends frames through the local OLA daemon (raises on import/connect failure)."""
+    def __init__(self, **_):
+        from ola.ClientWrapper import ClientWrapper
+        self._wr = ClientWrapper()
+        self._client = self._wr.Client()
+    def send(self, univ, frame):
+        self._client.SendDmx(univ, array("B", frame))
+
+class NullBackend:
+    """Keeps the buffer logic alive when no DMX interface is present."""
+    def __init__(self, **_): pass
+    def send(self, univ, frame): pass
+
+class ArtNetBackend:
+    """ArtDmx over UDP; `univ` is used as the 15-bit Art-Net port-address."""
+    def __init__(self, host="255.255.255.255", port=ARTNET_PORT, **_):
+        self.addr = (host, int(port))
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        self.seq = {}
+    def send(self, univ, frame):
+        seq = self.seq[univ] = self.seq.get(univ, 0) % 255 + 1
+        hdr = b"Art-Net\x00" + struct.pack("<H", 0x5000) + struct.pack(">HBBBBH", 14, seq, 0, univ & 0xFF, (univ >> 8) & 0x7F, len(frame))
+        self.sock.sendto(hdr + frame, self.addr)
+
+class SacnBackend:
+    """E1.31 (sACN) data packets; multicast 239.255.x.y per universe unless `host` is set."""
+    def __init__(self, host=None, port=SACN_PORT, priority=100, universe_offset=1, source="lightshow", **_):
+        self.host, self.port = host, int(port)
+        self.priority, self.offset = int(priority), int(universe_offset)
+        self.cid = uuid.uuid5(uuid.NAMESPACE_DNS, f"{source}.{socket.gethostname()}").bytes
+        self.source = source.encode()[:63].ljust(64, b"\x00")
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 4)
+        self.seq = {}
+    def send(self, univ, frame):
+        u = univ + self.offset                       # sACN-universes beginnen bij 1
+        seq = self.seq[u] = (self.seq.get(u, -1) + 1) & 0xFF
+        n = len(frame) + 1                           # + start code
+        pkt = (struct.pack(">HH12sHI16s", 0x0010, 0, b"ASC-E1.17\x00\x00\x00", 0x7000 | (109 + n), 0x04, self.cid)
+               + struct.pack(">HI64sBHBBH", 0x7000 | (87 + n), 0x02, self.source, self.priority, 0, seq, 0, u)
+               + struct.pack(">HBBHHH", 0x7000 | (10 + n), 0x02, 0xA1, 0, 1, n) + b"\x00" + frame)
+        host = self.host or f"239.255.{(u >> 8) & 0xFF}.{u & 0xFF}"
+        self.sock.sendto(pkt, (host, self.port))
+
+BACKENDS = {"ola": OlaBackend, "artnet": ArtNetBackend, "sacn": SacnBackend, "none": NullBackend}
+
+def make_backends(cfg):
+    """cfg: {"backend": "ola" | ["ola","artnet"], "artnet": {...}, "sacn": {...}} → list of backends."""
+    names = cfg.get("backend", "ola")
+    out = []
+    for n in ([names] if isinstance(names, str) else names):
+        try: out.append(BACKENDS[n](**(cfg.get(n) or {})))
+        except Exception: pass
+    return out or [NullBackend()]
+
+# ---------- Scheduler ----------
+class DmxOutput:
+    def __init__(self, backends, universes=(0,), refresh_hz=40, keepalive_s=1.0):
+        self.backends = list(backends)
+        self.universes = list(universes)
+        self.period = 1.0 / max(1.0, float(refresh_hz))
+        self.keepalive_s = float(keepalive_s)
+        self.buf = bytearray(512 * len(self.universes))
+        self.view = np.frombuffer(self.buf, dtype=np.uint8)   # writable view on buf
+        self.fades = FadeEngine(len(self.buf))
+        self.overlay = None                                   # bv. EffectEngine: render(out, now) op een kopie
+        self.observe = None                                   # optioneel: observe(univ, send_ms) per verzonden universe
+        self.lock = threading.Lock()
+        self._dirty = False
+        self._sent = [None] * len(self.universes)
+        self._wake = threading.Event()
+        self._thread = None
+        self.stats = {
+            "writes": 0, "frames_sent": 0, "frames_coalesced": 0, "keepalive_frames": 0,
+            "universes_unchanged": 0, "send_errors": 0,
+            "send_ms_last": 0.0, "send_ms_avg": 0.0, "send_ms_max": 0.0,
+        }
+
+    def write(self, items):
+        """Write (index, value) pairs into the frame; values are clamped to 0..255."""
+        with self.lock:
+            buf, size, fading = self.buf, len(self.buf), self.fades.busy
+            for idx, v in items:
+                if 0 <= idx < size:
+                    buf[idx] = max(0, min(255, int(v)))
+                    if fading: self.fades.active[idx] = False   # LTP: directe write wint van een fade
+            self.stats["writes"] += 1
+            if self._dirty: self.stats["frames_coalesced"] += 1
+            self._dirty = True
+        self._wake.set()
+
+    def write_idx(self, idx, value):
+        """Vectorized write: one value (or an array of values) into the index array `idx`."""
+        if len(idx) == 0: return
+        with self.lock:
+            self.view[idx] = np.clip(value, 0, 255)
+            self.fades.cancel(idx)
+            self.stats["writes"] += 1
+            if self._dirty: self.stats["frames_coalesced"] += 1
+            self._dirty = True
+        self._wake.set()
+
+    def write_masked(self, idx, values, glide=None, duration=0.0):
+        """One-frame recall of values at `idx`: channels where `glide` is set crossfade over
+        `duration` seconds, the rest snap."""
+        if len(idx) == 0: return
+        with self.lock:
+            if glide is None or duration <= 0 or not glide.any():
+                self.view[idx] = values; self.fades.cancel(idx)
+            else:
+                s = ~glide
+                self.view[idx[s]] = values[s]; self.fades.cancel(idx[s])
+                self.fades.start(idx[glide], values[glide], self.view, duration, time.monotonic())
+            self.stats["writes"] += 1
+            if self._dirty: self.stats["frames_coalesced"] += 1
+            self._dirty = True
+        self._wake.set()
+
+    def fade(self, items, duration, snap=()):
+        """Crossfade (index, value) pairs from their current value over `duration` seconds;
+        `snap` pairs are written at the start of the fade, all in the same frame."""
+        items = [(i, v) for i, v in items if 0 <= i < len(self.buf)]
+        with self.lock:
+            for i, v in snap:
+                if 0 <= i < len(self.buf):
+                    self.buf[i] = max(0, min(255, int(v))); self.fades.active[i] = False
+            if items:
+                idx, dst = zip(*items)
+                self.fades.start(idx, np.clip(dst, 0, 255), self.view, duration, time.monotonic())
+            self.stats["writes"] += 1
+            if self._dirty: self.stats["frames_coalesced"] += 1
+            self._dirty = True
+        self._wake.set()
+
+    def mark_dirty(self):
+        with self.lock:
+            if self._dirty: self.stats["frames_coalesced"] += 1
+            self._dirty = True
+        self._wake.set()
+
+    def start(self):
+        if self._thread: return
+        self._thread = threading.Thread(target=self._run, name="dmx-output", daemon=True)
+        self._thread.start()
+
+    def _send(self, univ, frame, keepalive):
+        st = self.stats
+        t0 = time.perf_counter()
+        for be in self.backends:
+            try: be.send(univ, frame)
+            except Exception: st["send_errors"] += 1
+        ms = (time.perf_counter() - t0) * 1000.0
+        st["frames_sent"] += 1
+        if keepalive: st["keepalive_frames"] += 1
+        st["send_ms_last"] = ms
+        st["send_ms_max"] = max(st["send_ms_max"], ms)
+        st["send_ms_avg"] += (ms - st["send_ms_avg"]) * 0.05   # EWMA
+        if self.observe: self.observe(univ, ms)
+
+    def _run(self):
+        last = last_full = 0.0
+        had_ov = False                          # vorig frame had effecten: na het wissen één schoon frame
+        while True:
+            # slaap tot er iets verandert of de keep-alive vervalt
+            if not self.fades.busy and not (self.overlay is not None and self.overlay.busy):
+                self._wake.wait(max(0.0, last_full + self.keepalive_s - time.monotonic()))
+            self._wake.clear()
+            ov = self.overlay if self.overlay is not None and self.overlay.busy else None   # na de wait: net gezet/gewist
+            # max. één frame per refresh-periode; writes in de tussentijd worden samengevoegd
+            wait = last + self.period - time.monotonic()
+            if wait > 0: time.sleep(wait)
+            full = time.monotonic() - last_full >= self.keepalive_s
+            now = time.monotonic()
+            with self.lock:
+                if self.fades.render(self.view, now): self._dirty = True
+                if not self._dirty and not full and ov is None and not had_ov: continue
+                self._dirty = False
+                base = self.view.copy() if ov is not None else None
+                frame = None if ov is not None else bytes(self.buf)
+            if ov is not None:
+                # effecten komen bovenop het basisframe; buf zelf blijft de "programmer"-stand
+                try: ov.render(base, now)
+                except Exception: self.stats["send_errors"] += 1
+                frame = base.tobytes()
+            had_ov = ov is not None
+            last = time.monotonic()
+            if full: last_full = last
+            for i, univ in enumerate(self.universes):
+                data = frame[i * 512:(i + 1) * 512]
+                if data == self._sent[i] and not full:
+                    self.stats["universes_unchanged"] += 1
+                    continue
+                keepalive = data == self._sent[i]
+                self._sent[i] = data
+                self._send(univ, data, keepalive)
+
+def listen(proto="artnet", host="0.0.0.0"):
+    """Stand-in receiver: prints packets/s and the first channels per universe every second."""
+    port = ARTNET_PORT if proto == "artnet" else SACN_PORT
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    s.bind((host, port))
+    seen, t_last = {}, time.monotonic()
+    while True:
+        pkt, _ = s.recvfrom(1024)
+        if proto == "artnet" and pkt[:8] == b"Art-Net\x00":
+            univ, data = pkt[14] | (pkt[15] << 8), pkt[18:]
+        elif proto == "sacn" and pkt[4:16] == b"ASC-E1.17\x00\x00\x00":
+            univ, data = struct.unpack(">H", pkt[113:115])[0], pkt[126:]
+        else: continue
+        ent = seen.setdefault(univ, [0, b""]); ent[0] += 1; ent[1] = data
+        if time.monotonic() - t_last >= 1.0:
+            for u, (n, d) in sorted(seen.items()):
+                print(f"{proto} universe {u}: {n} packets/s, ch1-16 {list(d[:16])}")
+            seen.clear(); t_last = time.monotonic()
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "--listen":
+        listen(sys.argv[2] if len(sys.argv) > 2 else "artnet")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Effect generator: LFO/chase waveforms over fixture groups, rendered into the outgoing DMX frame.
+
+An effect is a dict:
+  {"group": "moving_head", "attr": "pan", "wave": "sine", "rate": 0.25, "sync": true,
+   "spread": 0.5, "min": 40, "max": 215, "merge": "ltp"}
+
+`rate`   cycles per beat when `sync` (default), else cycles per second.
+`spread` phase offset spread over the group's fixtures (0 = unison, 1 = a full cycle: chase).
+`merge`  "ltp" replaces the channel, "htp" keeps the highest of base frame and effect.
+All effects are compiled into flat arrays (one entry per DMX channel), so a frame is a handful
+of NumPy operations no matter how many effects run. Effects never touch the base frame: the
+DMX thread renders them into a copy just before sending.
+"""
+import time
+import numpy as np
+
+WAVES = {"sine": 0, "saw": 1, "square": 2, "triangle": 3, "random": 4, "ramp_down": 5}
+
+class EffectEngine:
+    def __init__(self, patch, beat_fn=None):
+        self.patch = patch
+        self.beat_fn = beat_fn or (lambda t: t * 2.0)     # 120 BPM zonder klok
+        self.level = 1.0                                   # master voor alle effecten (0..1)
+        self.active = []                                   # specs zoals gezet
+        self._c = None                                     # gecompileerde arrays (atomair vervangen)
+        self.stats = {"effects": 0, "channels": 0, "frames": 0, "render_us_avg": 0.0, "render_us_max": 0.0}
+
+    @property
+    def busy(self):
+        return self._c is not None
+
+    def set(self, effects):
+        """Replace all running effects (compiled once here, not per frame)."""
+        idx, off, rate, sync, lo, hi, wave, htp, seed = [], [], [], [], [], [], [], [], []
+        for e in effects or []:
+            ch = self.patch.group_idx(e.get("group"), e.get("attr"))
+            n = len(ch)
+            if n == 0: continue
+            spread = float(e.get("spread", 0.0))
+            idx.append(ch)
+            off.append(np.arange(n) * (spread / n) + float(e.get("phase", 0.0)))
+            for arr, v in ((rate, float(e.get("rate", 1.0))), (sync, bool(e.get("sync", True))),
+                           (lo, float(e.get("min", 0))), (hi, float(e.get("max", 255))),
+                           (wave, WAVES.get(e.get("wave", "sine"), 0)), (htp, e.get("merge", "ltp") == "htp")):
+                arr.append(np.full(n, v))
+            seed.append(ch.astype(np.float64) * 0.618 + len(idx))
+        self.active = list(effects or [])
+        if not idx:
+            self._c = None
+            self.stats.update(effects=0, channels=0)
+            return
+        cat = np.concatenate
+        c = {"idx": cat(idx), "off": cat(off), "rate": cat(rate), "sync": cat(sync).astype(bool),
+             "lo": cat(lo), "span": cat(hi) - cat(lo), "wave": cat(wave).astype(np.int8),
+             "htp": cat(htp).astype(bool), "seed": cat(seed)}
+        c["ltp_sel"], c["htp_sel"] = np.flatnonzero(~c["htp"]), np.flatnonzero(c["htp"])
+        c["ltp_idx"], c["htp_idx"] = c["idx"][c["ltp_sel"]], c["idx"][c["htp_sel"]]
+        self._c = c
+        self.stats.update(effects=len(self.active), channels=len(c["idx"]))
+
+    def clear(self):
+        self.set([])
+
+    def values(self, t, beat):
+        """Effect output 0..255 per compiled channel (float64)."""
+        c = self._c
+        x = np.where(c["sync"], beat, t) * c["rate"] + c["off"]
+        p = x - np.floor(x)
+        w = c["wave"]
+        y = np.select(
+            [w == 0, w == 1, w == 2, w == 3, w == 4],
+            [0.5 - 0.5 * np.cos(2 * np.pi * p), p, (p < 0.5).astype(np.float64), 1.0 - np.abs(2.0 * p - 1.0),
+             np.modf(np.abs(np.sin(np.floor(x) * 12.9898 + c["seed"] * 78.233)) * 43758.5453)[0]],   # sample & hold
+            1.0 - p)
+        return c["lo"] + c["span"] * y * self.level
+
+    def render(self, out, now):
+        """Merge the effects into `out` (uint8 frame copy) for time `now`."""
+        c = self._c
+        if c is None: return False
+        t0 = time.perf_counter()
+        v = np.clip(np.rint(self.values(now, self.beat_fn(now))), 0, 255).astype(np.uint8)
+        if len(c["ltp_sel"]): out[c["ltp_idx"]] = v[c["ltp_sel"]]
+        if len(c["htp_sel"]): np.maximum.at(out, c["htp_idx"], v[c["htp_sel"]])
+        us = (time.perf_counter() - t0) * 1e6
+        st = self.stats
+        st["frames"] += 1; st["render_us_max"] = max(st["render_us_max"], us)
+        st["render_us_avg"] += (us - st["render_us_avg"]) * 0.05
+        return True
+
+def expand(spec, presets):
+    """Effect list for a preset name / list of names / inline effect dicts."""
+    if spec is None: return []
+    if isinstance(spec, dict): return [spec]
+    if isinstance(spec, str): return [dict(e) for e in presets.get(spec, [])]
+    out = []
+    for s in spec: out += expand(s, presets)
+    return out
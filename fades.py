@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""Crossfade engine: per-channel fade state in flat arrays, rendered by the DMX output thread."""
+import numpy as np
+
+class FadeEngine:
+    """One slot per DMX channel; a new fade (or a direct write) on a channel replaces the old one (LTP)."""
+    def __init__(self, size):
+        self.active = np.zeros(size, dtype=bool)
+        self.src = np.zeros(size, dtype=np.float32)
+        self.dst = np.zeros(size, dtype=np.float32)
+        self.t0 = np.zeros(size, dtype=np.float64)
+        self.dur = np.ones(size, dtype=np.float64)
+        self.busy = False
+        self.stats = {"fades_started": 0, "channels_done": 0, "channels_active": 0}
+
+    def start(self, idx, dst, current, duration, now):
+        idx = np.asarray(idx, dtype=np.intp)
+        if len(idx) == 0: return
+        self.src[idx] = current[idx]
+        self.dst[idx] = dst
+        self.t0[idx] = now
+        self.dur[idx] = max(1e-3, float(duration))
+        self.active[idx] = True
+        self.busy = True
+        self.stats["fades_started"] += 1
+
+    def cancel(self, idx):
+        if self.busy: self.active[idx] = False
+
+    def render(self, view, now):
+        """Write the current fade values into `view`; returns True when anything moved."""
+        if not self.busy: return False
+        idx = np.flatnonzero(self.active)
+        if len(idx) == 0:
+            self.busy = False
+            return False
+        p = np.clip((now - self.t0[idx]) / self.dur[idx], 0.0, 1.0)
+        src = self.src[idx]
+        view[idx] = np.rint(src + (self.dst[idx] - src) * p).astype(np.uint8)
+        done = p >= 1.0
+        if done.any():
+            self.active[idx[done]] = False
+            self.stats["channels_done"] += int(done.sum())
+        self.stats["channels_active"] = int(len(idx) - done.sum())
+        self.busy = self.stats["channels_active"] > 0
+        return True
@@ -15,7 +15,7 @@ if [ ! -d venv ]; then
   python3 -m venv venv
 fi
 source venv/bin/activate
-pip install -r requirements.txt
+pip install -r requirements.txt   # o.a. numpy (hard nodig voor app.py) en waitress
 
 # Nginx configuratie
 sudo tee /etc/nginx/sites-available/lightshow <<EOF
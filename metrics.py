@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""In-process metrics: fixed-bucket histograms, counters and gauges in Prometheus text format,
+plus a sampling profiler (stack samples of the running threads, no tracing overhead).
+
+Histograms are cumulative-bucket counters updated with a bisect, so `observe` costs about a
+microsecond and is safe to call from every engine tick, DMX frame and request.
+"""
+import sys, time, bisect, threading, traceback
+from collections import Counter
+
+MS_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 50, 100, 250, 500, 1000)
+
+def _labels(labels):
+    return "" if not labels else "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+class Histogram:
+    def __init__(self, buckets=MS_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)   # laatste = +Inf
+        self.sum, self.count = 0.0, 0
+
+    def observe(self, v):
+        self.counts[bisect.bisect_left(self.buckets, v)] += 1
+        self.sum += v; self.count += 1
+
+class Metrics:
+    def __init__(self, prefix="lightshow"):
+        self.prefix = prefix
+        self.hist = {}          # (name, labels) → Histogram
+        self.counters = Counter()
+        self.gauges = []        # callables → [(name, labels-dict, value)]
+        self.last_error = {}    # stage → "Type: msg" (voor /api/metrics/errors)
+        self.lock = threading.Lock()
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        h = self.hist.get(key)
+        if h is None:
+            with self.lock: h = self.hist.setdefault(key, Histogram())
+        h.observe(value)
+
+    def inc(self, name, n=1, **labels):
+        self.counters[(name, tuple(sorted(labels.items())))] += n
+
+    def error(self, stage, exc):
+        self.inc("errors_total", stage=stage)
+        self.last_error[stage] = "".join(traceback.format_exception_only(type(exc), exc)).strip()
+
+    def timer(self, name, **labels):
+        return _Timer(self, name, labels)
+
+    def gauge(self, fn):
+        """fn() → iterable of (name, {labels}, value); evaluated at scrape time."""
+        self.gauges.append(fn)
+
+    def prometheus(self):
+        p, out, typed = self.prefix, [], set()
+        for (name, labels), h in sorted(self.hist.items()):
+            if name not in typed:
+                typed.add(name); out.append(f"# TYPE {p}_{name}_ms histogram")
+            acc = 0
+            for b, c in zip([str(b) for b in h.buckets] + ["+Inf"], h.counts):
+                acc += c
+                out.append(f"{p}_{name}_ms_bucket{_labels(labels + (('le', b),))} {acc}")
+            out.append(f"{p}_{name}_ms_sum{_labels(labels)} {h.sum:.3f}")
+            out.append(f"{p}_{name}_ms_count{_labels(labels)} {h.count}")
+        for (name, labels), v in sorted(self.counters.items()):
+            out.append(f"{p}_{name}{_labels(labels)} {v}")
+        for fn in self.gauges:
+            try:
+                for name, labels, v in fn():
+                    if isinstance(v, bool): v = int(v)
+                    if isinstance(v, (int, float)):
+                        out.append(f"{p}_{name}{_labels(tuple(sorted(labels.items())))} {v}")
+            except Exception:
+                pass
+        return "\n".join(out) + "\n"
+
+class _Timer:
+    __slots__ = ("m", "name", "labels", "t0", "ms")
+    def __init__(self, m, name, labels):
+        self.m, self.name, self.labels = m, name, labels
+    def __enter__(self):
+        self.t0 = time.perf_counter(); return self
+    def __exit__(self, *exc):
+        self.ms = (time.perf_counter() - self.t0) * 1000.0
+        self.m.observe(self.name, self.ms, **self.labels)
+        return False
+
+def stats_gauges(prefix, stats, **labels):
+    """Flat numeric stats dict → gauge triples (for the existing per-module `stats` dicts)."""
+    return [(f"{prefix}_{k}", labels, v) for k, v in stats.items() if isinstance(v, (int, float, bool))]
+
+# ---------- Sampling profiler ----------
+class SamplingProfiler:
+    """Samples the stacks of all threads (or those named in `threads`) every `interval` seconds.
+    Results are collapsed stacks ("thread;file:func;file:func count"), usable with flamegraph.pl."""
+    def __init__(self):
+        self.samples = Counter()
+        self.running = False
+        self.interval = 0.005
+        self.threads = None
+        self.started = self.stopped = None
+        self.n = 0
+
+    def start(self, interval=0.005, threads=None, reset=True):
+        if self.running: return
+        if reset: self.samples.clear(); self.n = 0
+        self.interval, self.threads = float(interval), set(threads) if threads else None
+        self.running, self.started, self.stopped = True, time.time(), None
+        threading.Thread(target=self._run, name="profiler", daemon=True).start()
+
+    def stop(self):
+        self.running, self.stopped = False, time.time()
+
+    def _run(self):
+        me = threading.get_ident()
+        while self.running:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():
+                name = names.get(tid, str(tid))
+                if tid == me or (self.threads and name not in self.threads): continue
+                stack = []
+                while frame is not None and len(stack) < 40:
+                    co = frame.f_code
+                    stack.append(f"{co.co_filename.rsplit('/', 1)[-1]}:{co.co_name}")
+                    frame = frame.f_back
+                self.samples[name + ";" + ";".join(reversed(stack))] += 1
+            self.n += 1
+            time.sleep(self.interval)
+
+    def report(self, top=25):
+        leaf = Counter()
+        for stack, c in self.samples.items(): leaf[stack.rsplit(";", 1)[-1]] += c
+        total = sum(self.samples.values()) or 1
+        return {"running": self.running, "ticks": self.n, "interval_ms": self.interval * 1000.0,
+                "started": self.started, "stopped": self.stopped,
+                "top": [{"frame": f, "samples": c, "pct": round(100.0 * c / total, 1)} for f, c in leaf.most_common(top)]}
+
+    def collapsed(self):
+        return "\n".join(f"{s} {c}" for s, c in self.samples.most_common()) + "\n"
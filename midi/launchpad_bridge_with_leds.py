@@ -1,13 +1,5 @@
 #!/usr/bin/env python3
-import time, mido, json, os
-from midi_utils import midi_cfg, midi_remap, route_action, lp_light, state
-
-# --- Poorten zoeken ---
-def open_ports():
-    ins  = [n for n in mido.get_input_names()  if "Launchpad" in n]
-    outs = [n for n in mido.get_output_names() if "Launchpad" in n]
-    return (mido.open_input(ins[0]) if ins else None,
-            mido.open_output(outs[0]) if outs else None)
+from midi_utils import midi_cfg, midi_remap, route_action, lp_light, post, MidiInput, LEDS, LINK
 
 # --- Mapping helpers ---
 def build_default_map():
@@ -96,10 +88,6 @@ def build_note_index_map():
     return idx, top, right
 
 def main():
-    inp, outp = open_ports()
-    if not inp or not outp:
-        while True: time.sleep(1)
-
     default_map = build_default_map()
     grid_map, top_map, right_map = build_note_index_map()
 
@@ -107,39 +95,68 @@ def main():
     learn = remap.get("learn_mode", False)
     l_map = remap["map"]["launchpad"]["note"]  # {note: action}
 
-    # LED init: zet AI actief pad aan (optioneel)
-    while True:
-        for msg in inp.iter_pending():
-            if msg.type == "note_on" and msg.velocity > 0:
-                note = msg.note
-                action = l_map.get(str(note))
-                if action is None:
-                    # Bepaal positie → actie uit default_map
-                    if note in top_map:
-                        key = f"top:{top_map[note][1]}"
-                        action = default_map.get(key)
-                    elif note in right_map:
-                        key = f"right:{right_map[note][1]}"
-                        action = default_map.get(key)
-                    else:
-                        rc = grid_map.get(note)
-                        if rc:
-                            r, c = rc
-                            key = f"r{r}:{c}"
-                            action = default_map.get(key)
+    def resolve(note):
+        action = l_map.get(str(note))
+        if action is None:
+            # Bepaal positie → actie uit default_map
+            if note in top_map:
+                action = default_map.get(f"top:{top_map[note][1]}")
+            elif note in right_map:
+                action = default_map.get(f"right:{right_map[note][1]}")
+            else:
+                rc = grid_map.get(note)
+                if rc:
+                    r, c = rc
+                    action = default_map.get(f"r{r}:{c}")
+        return action
+
+    # --- Feedback: pads die backend-state tonen (actieve AI-cluster, mode, band pauze) ---
+    notes = list(grid_map) + list(top_map) + list(right_map)
+    state_pads = {n: a for n in notes if (a := resolve(n)) and
+                  (a.startswith("ai_cluster:") or a in ("ai_toggle","ai_mode","band_mode","manual_mode"))}
+    mirror = {}
+    dev = {"out": None}
+
+    def pad_vel(action):
+        if action.startswith("ai_cluster:"):
+            on = mirror.get("ai_cluster") == action.split(":",1)[1]
+        elif action == "ai_toggle":
+            on = bool(mirror.get("ai_enabled"))
+        elif action == "band_mode" and mirror.get("mode") == "band" and mirror.get("band_paused"):
+            return LEDS.vel("warn")
+        else:
+            on = mirror.get("mode") == {"ai_mode":"ai","band_mode":"band","manual_mode":"manual"}[action]
+        return LEDS.vel("on" if on else "off")
+
+    def render_state():
+        LEDS.apply(dev["out"], {n: pad_vel(a) for n, a in state_pads.items()})
+
+    def on_state(changes, full):
+        if full: mirror.clear()
+        mirror.update(changes)
+        render_state()
+
+    def on_open(outp):
+        dev["out"] = outp
+        render_state()
 
-                if learn:
-                    # laat backend weten voor remap UI
-                    from midi_utils import post
-                    post("/api/midi/log", {"device":"launchpad","note":note,"suggested":action})
-                if action:
-                    route_action(action)
-                    lp_light(outp, note, on=True)
-            elif msg.type == "note_off" or (msg.type=="note_on" and msg.velocity==0):
-                # momentary release
-                lp_light(outp, msg.note, on=False)
+    def handle(msg, outp):
+        if msg.type == "note_on" and msg.velocity > 0:
+            note = msg.note
+            action = resolve(note)
+            if learn:
+                # laat backend weten voor remap UI
+                post("/api/midi/log", {"device":"launchpad","note":note,"suggested":action})
+            if action:
+                route_action(action)
+                if note not in state_pads: lp_light(outp, note, on=True)
+        elif msg.type == "note_off" or (msg.type=="note_on" and msg.velocity==0):
+            # momentary release; state-pads volgen de backend
+            if msg.note not in state_pads: lp_light(outp, msg.note, on=False)
 
-        time.sleep(0.005)
+    if LINK is not None:
+        LINK.subscribe(("mode","ai_enabled","ai_cluster","band_paused","band_running"), on_state)
+    MidiInput("launchpad", lambda n: "Launchpad" in n, handle, on_open=on_open).run()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,10 +1,12 @@
 #!/usr/bin/env python3
-import json, os, time, requests, threading
+import json, os, time, queue, socket, requests, threading
+from collections import deque
 
 BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 CFG_MIDI = os.path.join(BASE, "config", "midi_layout.json")
 CFG_REMAP= os.path.join(BASE, "config", "midi_remap.json")
 CFG_LED  = os.path.join(BASE, "config", "midi_led_map.json")
+CFG_SETTINGS = os.path.join(BASE, "config", "settings.json")
 
 API = "http://127.0.0.1:5000"
 
@@ -13,12 +15,74 @@ def jload(p, default):
         with open(p) as f: return json.load(f)
     except: return default
 
+_HTTP = requests.Session()   # keep-alive i.p.v. een nieuwe verbinding per bericht
+
+# --- Persistent link naar app.py (lokale UDP, gebatchte JSON) ---
+class Link:
+    """Fire-and-forget channel to the backend: messages queued while a datagram is in flight
+    go out together as one batch {"b": [[path, payload], ...]}."""
+    MAX_BATCH = 8000   # bytes per datagram
+
+    def __init__(self, host="127.0.0.1", port=5005):
+        self.addr = (host, int(port))
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, 0))          # vaste bronpoort: backend pusht state terug naar hier
+        self.q = queue.Queue()
+        self.stats = {"messages": 0, "batches": 0, "errors": 0, "state_updates": 0}
+        threading.Thread(target=self._run, name="midi-link", daemon=True).start()
+
+    def subscribe(self, keys, callback, renew_s=5.0):
+        """Ask the backend to push changes of STATE[keys]; callback(changes, full) runs on the
+        receive thread. The subscription is renewed every renew_s (backend expires it after 15 s)."""
+        def renew():
+            while True:
+                try: self.sock.sendto(json.dumps({"sub": list(keys)}).encode(), self.addr)
+                except OSError: self.stats["errors"] += 1
+                time.sleep(renew_s)
+        def recv():
+            while True:
+                try:
+                    msg = json.loads(self.sock.recvfrom(65535)[0])
+                    self.stats["state_updates"] += 1
+                    callback(msg.get("state") or {}, bool(msg.get("full")))
+                except Exception:
+                    self.stats["errors"] += 1
+        threading.Thread(target=renew, name="midi-link-sub", daemon=True).start()
+        threading.Thread(target=recv, name="midi-link-recv", daemon=True).start()
+
+    def send(self, path, payload):
+        self.q.put((path, payload))
+
+    def _flush(self, batch):
+        try:
+            self.sock.sendto(json.dumps({"b": batch}, separators=(",", ":")).encode(), self.addr)
+            self.stats["batches"] += 1; self.stats["messages"] += len(batch)
+        except OSError:
+            self.stats["errors"] += 1
+
+    def _run(self):
+        while True:
+            batch, size = [self.q.get()], 0
+            while True:
+                try: msg = self.q.get_nowait()
+                except queue.Empty: break
+                size += len(str(msg))
+                batch.append(msg)
+                if size > self.MAX_BATCH:
+                    self._flush(batch); batch, size = [], 0
+            if batch: self._flush(batch)
+
+_LINK_CFG = jload(CFG_SETTINGS, {}).get("midi_link") or {}
+LINK = Link(_LINK_CFG.get("host", "127.0.0.1"), _LINK_CFG.get("port", 5005)) if _LINK_CFG.get("enabled", True) else None
+
 def post(path, payload, to=0.25):
-    try: requests.post(API+path, json=payload, timeout=to)
+    if LINK is not None:
+        LINK.send(path, payload); return
+    try: _HTTP.post(API+path, json=payload, timeout=to)
     except: pass
 
 def get(path, to=0.25):
-    try: return requests.get(API+path, timeout=to).json()
+    try: return _HTTP.get(API+path, timeout=to).json()
     except: return {}
 
 def state(): return get("/api/state") or {}
@@ -32,12 +96,127 @@ def midi_remap():
 def midi_led_map():
     return jload(CFG_LED, {"on":3, "off":0, "warn":1})
 
+# --- Event-driven MIDI input met hot-plug reconnect ---
+class MidiInput:
+    """Opens the first port whose name passes `match` with a mido callback; messages are queued
+    and dispatched by one worker thread as `handler(msg, out_port)`. `idle()` runs after every
+    batch and may return a timeout (s) for the next wake-up (deferred work such as CC flushes).
+    run() supervises the ports and reopens them after an unplug."""
+    def __init__(self, device, match, handler, idle=None, on_open=None, with_output=True, poll_s=1.0, report_s=30.0):
+        self.device, self.match, self.handler, self.idle, self.on_open = device, match, handler, idle, on_open
+        self.with_output, self.poll_s, self.report_s = with_output, poll_s, report_s
+        self.inp = self.out = self.name = None
+        self.q = queue.Queue()
+        self.lat = deque(maxlen=2048)      # receive → dispatched (ms)
+        self.stats = {"received": 0, "dispatched": 0, "errors": 0, "reconnects": 0}
+
+    def _cb(self, msg):
+        self.q.put((time.perf_counter(), msg))
+
+    def _open(self):
+        import mido
+        ins = [n for n in mido.get_input_names() if self.match(n)]
+        if not ins: return False
+        self.out = None
+        if self.with_output:
+            outs = [n for n in mido.get_output_names() if self.match(n)]
+            if outs: self.out = mido.open_output(outs[0])
+        self.inp = mido.open_input(ins[0], callback=self._cb)
+        self.name = ins[0]
+        if self.on_open: self.on_open(self.out)
+        return True
+
+    def _close(self):
+        for p in (self.inp, self.out):
+            try:
+                if p is not None: p.close()
+            except Exception: pass
+        self.inp = self.out = self.name = None
+
+    def latency(self):
+        v = sorted(self.lat)
+        if not v: return {"count": 0}
+        return {"count": len(v), "ms_avg": sum(v) / len(v), "ms_p50": v[len(v) // 2],
+                "ms_p99": v[min(len(v) - 1, int(len(v) * 0.99))], "ms_max": v[-1]}
+
+    def _worker(self):
+        timeout = None
+        while True:
+            try: batch = [self.q.get(timeout=timeout)]
+            except queue.Empty: batch = []
+            while True:
+                try: batch.append(self.q.get_nowait())
+                except queue.Empty: break
+            for _, msg in batch:
+                self.stats["received"] += 1
+                try: self.handler(msg, self.out)
+                except Exception: self.stats["errors"] += 1
+            try: timeout = self.idle() if self.idle else None
+            except Exception: timeout = None
+            now = time.perf_counter()
+            for t_in, _ in batch:
+                self.lat.append((now - t_in) * 1000.0); self.stats["dispatched"] += 1
+
+    def run(self):
+        import mido
+        threading.Thread(target=self._worker, name=f"{self.device}-dispatch", daemon=True).start()
+        t_report = time.monotonic()
+        while True:
+            try:
+                if self.name is None or self.name not in mido.get_input_names():
+                    if self.name is not None:
+                        self._close(); self.stats["reconnects"] += 1
+                    self._open()
+            except Exception:
+                self._close()
+            if time.monotonic() - t_report >= self.report_s:
+                t_report = time.monotonic()
+                post("/api/midi/log", {"device": self.device, "metrics": dict(self.stats, port=self.name, latency=self.latency())})
+            time.sleep(self.poll_s)
+
+# --- CC coalescing / rate limiting ---
+class CCCoalescer:
+    """Collapse CC messages per control to the latest value and send each control at most
+    `max_rate_hz` times per second; the final resting value is always delivered."""
+    def __init__(self, send, max_rate_hz=50):
+        self.send = send
+        self.min_dt = 1.0 / max(1.0, float(max_rate_hz))
+        self.pending = {}     # key → (action, value)
+        self.last_t = {}      # key → tijd van laatste verzending
+        self.last_v = {}      # key → laatst verzonden waarde
+        self.stats = {"in": 0, "sent": 0, "collapsed": 0, "unchanged": 0}
+
+    def push(self, key, action, value):
+        self.stats["in"] += 1
+        if key in self.pending: self.stats["collapsed"] += 1
+        self.pending[key] = (action, value)
+
+    def flush(self, now=None):
+        """Send what is due; returns seconds until the next deferred send (None if nothing waits)."""
+        now = time.monotonic() if now is None else now
+        due = None
+        for key, (action, value) in list(self.pending.items()):
+            if self.last_v.get(key) == value:
+                del self.pending[key]; self.stats["unchanged"] += 1
+                continue
+            wait = self.last_t.get(key, -1e9) + self.min_dt - now
+            if wait <= 0:
+                del self.pending[key]
+                self.send(action, value)
+                self.last_t[key], self.last_v[key] = now, value
+                self.stats["sent"] += 1
+            else:
+                due = wait if due is None else min(due, wait)
+        return due
+
 # --- routing helpers (abstract actions → API) ---
 def route_action(action, value=None):
     """Map een abstracte actie naar de juiste API-call."""
     if action in ("ai_toggle","ai_full_toggle","band_pause_toggle","band_stop"):
         post("/api/show/control", {"cmd": action})
         return
+    if action in ("cue_go","cue_back","cue_stop"):
+        post("/api/cues/control", {"cmd": action[4:]}); return
     if action in ("force_auto","force_a","force_b","force_c"):
         m = {"force_auto":0,"force_a":1,"force_b":2,"force_c":3}[action]
         post("/api/force", {"set": m}); return
@@ -76,11 +255,54 @@ def route_action(action, value=None):
     post("/api/midi/log", {"action": action, "value": value})
 
 # --- Launchpad LED API (abstract; per apparaat kan dit verschillen) ---
+class LedFeedback:
+    """Shadow model of the pad LEDs: the LED map is loaded once (reloaded when the file changes)
+    and MIDI is only sent when a pad's velocity actually changes."""
+    def __init__(self, path=CFG_LED, check_s=1.0):
+        self.path, self.check_s = path, check_s
+        self.lock = threading.Lock()
+        self.shadow = {}          # note → velocity zoals nu op het apparaat
+        self.port = None
+        self.stats = {"sent": 0, "skipped": 0}
+        self._mtime, self._checked, self._map = None, 0.0, {"on":3, "off":0, "warn":1}
+        self._msg = None
+
+    def led_map(self):
+        now = time.monotonic()
+        if now - self._checked >= self.check_s:
+            self._checked = now
+            try: mt = os.path.getmtime(self.path)
+            except OSError: mt = None
+            if mt != self._mtime:
+                self._mtime, self._map = mt, jload(self.path, {"on":3, "off":0, "warn":1})
+        return self._map
+
+    def vel(self, kind):
+        return self.led_map().get(kind, {"on":3, "off":0, "warn":1}.get(kind, 0))
+
+    def set(self, out_port, note, vel):
+        if out_port is None: return
+        with self.lock:
+            if out_port is not self.port:            # nieuw apparaat (reconnect): schaduw wissen
+                self.port = out_port; self.shadow.clear()
+            if self.shadow.get(note) == vel:
+                self.stats["skipped"] += 1; return
+            if self._msg is None:
+                import mido
+                self._msg = mido.Message
+            try:
+                out_port.send(self._msg("note_on", note=note, velocity=vel))
+                self.shadow[note] = vel; self.stats["sent"] += 1
+            except Exception:
+                pass
+
+    def apply(self, out_port, pads):
+        """pads: {note: velocity}; sends only the differences with the shadow."""
+        for note, vel in pads.items(): self.set(out_port, note, vel)
+
+LEDS = LedFeedback()
+
 def lp_light(out_port, note, on=True, vel=None):
     """Zet Launchpad-pad LED aan/uit (vel = kleur/helderheid indien ondersteund)."""
-    try:
-        import mido
-        if vel is None: vel = midi_led_map().get("on" if on else "off", 3 if on else 0)
-        out_port.send(mido.Message("note_on", note=note, velocity=vel))
-    except Exception:
-        pass
\ No newline at end of file
+    if vel is None: vel = LEDS.vel("on" if on else "off")
+    LEDS.set(out_port, note, vel)
\ No newline at end of file
@@ -1,15 +1,11 @@
 #!/usr/bin/env python3
-import time, mido
-from midi_utils import midi_cfg, midi_remap, midi_led_map, route_action, post
+from midi_utils import midi_cfg, midi_remap, midi_led_map, route_action, post, CCCoalescer, MidiInput
 
 # Aanname: MIDImix exposeert 8 faders + 24 knoppen (A/B/C rows) + 8 top/8 second/4 right buttons.
 # CC/Note nummers verschillen soms per OS/driver; remap voorziet dit.
 
-def open_ports():
-    ins  = [n for n in mido.get_input_names()  if "MIDImix" in n or "MIDI" in n]
-    outs = [n for n in mido.get_output_names() if "MIDImix" in n or "MIDI" in n]
-    return (mido.open_input(ins[0]) if ins else None,
-            mido.open_output(outs[0]) if outs else None)
+def is_midimix(name):
+    return "MIDImix" in name or "MIDI" in name
 
 def build_controls():
     """Bouw abstracte acties per controller-element t.o.v. config/midi_layout.json."""
@@ -41,10 +37,6 @@ def build_controls():
     return K, RB
 
 def main():
-    inp, outp = open_ports()
-    if not inp: 
-        while True: time.sleep(1)
-
     logical, right_btns = build_controls()
     remap = midi_remap()
     learn = remap.get("learn_mode", False)
@@ -66,31 +58,31 @@ def main():
     }
 
     LED = midi_led_map()
+    # faders/knobs: per control alleen de laatste waarde, max. cc_max_rate_hz per control
+    cc_out = CCCoalescer(route_action, midi_cfg().get("midimix", {}).get("cc_max_rate_hz", 50))
+
+    def handle(msg, outp):
+        if msg.type == "control_change":
+            cc, val = msg.control, msg.value
+            action = mp_cc.get(str(cc)) or default_map_cc.get(str(cc))
+            if learn:
+                post("/api/midi/log", {"device":"midimix","cc":cc,"suggested":action})
+            if action:
+                # faders/knobs → 0..127 raw; backend schaalt naar DMX/WLED
+                cc_out.push(cc, action, val)
+        elif msg.type == "note_on" and msg.velocity > 0:
+            note = msg.note
+            action = mp_nt.get(str(note)) or default_map_note.get(str(note))
+            if learn:
+                post("/api/midi/log", {"device":"midimix","note":note,"suggested":action})
+            if action:
+                route_action(action, 127)
+        elif msg.type == "note_off":
+            # momentary release (b.v. strobo), stuur 0 indien nodig
+            pass
 
-    while True:
-        for msg in inp.iter_pending():
-            try:
-                if msg.type == "control_change":
-                    cc, val = msg.control, msg.value
-                    action = mp_cc.get(str(cc)) or default_map_cc.get(str(cc))
-                    if learn:
-                        post("/api/midi/log", {"device":"midimix","cc":cc,"suggested":action})
-                    if action:
-                        # faders/knobs → 0..127 raw; backend schaalt naar DMX/WLED
-                        route_action(action, val)
-                elif msg.type == "note_on" and msg.velocity > 0:
-                    note = msg.note
-                    action = mp_nt.get(str(note)) or default_map_note.get(str(note))
-                    if learn:
-                        post("/api/midi/log", {"device":"midimix","note":note,"suggested":action})
-                    if action:
-                        route_action(action, 127)
-                elif msg.type == "note_off":
-                    # momentary release (b.v. strobo), stuur 0 indien nodig
-                    pass
-            except Exception:
-                pass
-        time.sleep(0.004)
+    # uitgestelde CC-waarden worden verstuurd zodra ze aan de beurt zijn (idle → timeout)
+    MidiInput("midimix", is_midimix, handle, idle=cc_out.flush).run()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
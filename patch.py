@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""Compiled fixture patch: absolute DMX indices per fixture and per group/attribute, built once."""
+import numpy as np
+
+_EMPTY = np.zeros(0, dtype=np.intp)
+
+class FixturePatch:
+    """Indices are absolute in the flat multi-universe frame: slot * 512 + (start + ch - 2)."""
+    def __init__(self, fixtures_cfg, default_universe=0):
+        self.fixtures = {}      # name  → {attr: idx}
+        self.groups = {}        # group → {attr: ndarray[idx]}
+        self.rejected = []      # fixtures/channels outside their universe (niet meer stil weggegooid)
+        fixtures = (fixtures_cfg or {}).get("fixtures", {})
+        self.universes = sorted({default_universe} | {int(fx.get("universe", default_universe)) for fx in fixtures.values()})
+        self.slot = {u: i for i, u in enumerate(self.universes)}
+        self.size = 512 * len(self.universes)
+        for name, fx in fixtures.items():
+            start = fx.get("start")
+            if start is None: continue
+            base = self.slot[int(fx.get("universe", default_universe))] * 512
+            m = {}
+            for attr, ch in (fx.get("ch") or {}).items():
+                idx = start + ch - 2
+                if 0 <= idx < 512: m[attr] = base + idx
+                else: self.rejected.append(f"{name}.{attr}")
+            self.fixtures[name] = m
+        for group, members in (fixtures_cfg or {}).get("groups", {}).items():
+            self.groups[group] = self._collect(members)
+
+    def _collect(self, names):
+        acc = {}
+        for n in names:
+            for attr, idx in self.fixtures.get(n, {}).items():
+                acc.setdefault(attr, []).append(idx)
+        return {a: np.array(v, dtype=np.intp) for a, v in acc.items()}
+
+    def channels(self, name):
+        return self.fixtures.get(name, {})
+
+    def group_idx(self, group, attr):
+        return self.groups.get(group, {}).get(attr, _EMPTY)
+
+    def resolve(self, name, values):
+        """(idx, value) pairs for the attributes of `values` that the fixture has."""
+        m = self.fixtures.get(name, {})
+        return [(m[k], v) for k, v in values.items() if k in m]
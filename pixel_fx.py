@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""Pixel effects rendered in Python for WLED realtime streaming (keys match custom_pixel_fx.json)."""
+import numpy as np
+
+def _pos(n, reverse=False):
+    p = np.arange(n, dtype=np.float32) / max(1, n)
+    return p[::-1].copy() if reverse else p
+
+def _chase(n, beat, rev):   return ((_pos(n, rev) * 4 - beat) % 1.0 < 0.25).astype(np.float32)
+def _strobe(n, beat, rev):  return np.full(n, 1.0 if beat % 1.0 < 0.12 else 0.0, np.float32)
+def _lr(n, beat, rev):      return (_pos(n, rev) <= beat % 1.0).astype(np.float32)
+def _runner(n, beat, rev):  return (np.abs(_pos(n, rev) - beat % 1.0) < 1.5 / max(1, n)).astype(np.float32)
+
+def _comet(n, beat, rev, tail=0.25):
+    d = (beat % 1.0 - _pos(n, rev)) % 1.0          # afstand achter de kop
+    return np.exp(-d / (tail / 4)).astype(np.float32)
+
+def _photon(n, beat, rev):  return _comet(n, beat * 2, rev, tail=0.08)
+
+def _chaos(n, beat, rev):
+    return np.random.default_rng(int(beat * 16)).random(n, dtype=np.float32) ** 3
+
+def _twinkle(n, beat, rev):
+    step = beat * 4
+    spark = np.random.default_rng(int(step)).random(n, dtype=np.float32) > 0.85
+    return spark * np.float32(1.0 - step % 1.0)
+
+def _plasma(n, beat, rev):
+    p = _pos(n, rev) * 2 * np.pi
+    return (0.5 + 0.25 * np.sin(p * 3 + beat * np.pi) + 0.25 * np.sin(p * 5 - beat * 0.7 * np.pi)).astype(np.float32)
+
+def _ripple(n, beat, rev):
+    d = np.abs(_pos(n) - 0.5) * 2
+    return np.exp(-np.abs(d - beat % 1.0) * 12).astype(np.float32)
+
+RENDERERS = {
+    "pix_strobe": _strobe, "pix_chase": _chase, "pix_lr": _lr, "pix_chaos": _chaos,
+    "pix_comet": _comet, "pix_runner": _runner, "pix_twinkle": _twinkle,
+    "pix_plasma": _plasma, "pix_photon": _photon, "pix_ripple": _ripple,
+}
+
+def render(fx, n, beat, rgb, intensity=255, reverse=False):
+    """RGB bytes for `n` LEDs; `beat` is the (fractional) beat count driving the motion."""
+    fn = RENDERERS.get(fx)
+    if fn is None: return None
+    level = fn(n, beat, reverse) * (max(0, min(255, intensity)) / 255.0)
+    px = np.outer(level, np.asarray(rgb, np.float32))
+    return px.clip(0, 255).astype(np.uint8).tobytes()
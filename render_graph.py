@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Render-on-change outputs for the engine ticks.
+
+Each output (a WLED device, a DMX fixture block) declares the top-level STATE keys it reads
+and optionally a `live` function for inputs that do not live in STATE (audio modulation).
+A tick renders an output only when one of its keys is in the StateStore journal since that
+group's previous tick, its live value differs, or it is older than `refresh_s` (a safety net
+for writes the graph does not see: manual fixture overrides, a rebooted WLED, config reloads).
+"""
+import time
+
+class Output:
+    __slots__ = ("name", "deps", "render", "live", "last_live", "last_t", "dirty", "stats")
+    def __init__(self, name, deps, render, live=None):
+        self.name, self.deps, self.render, self.live = name, frozenset(deps), render, live
+        self.last_live, self.last_t, self.dirty = None, 0.0, True
+        self.stats = {"renders": 0, "skipped": 0, "errors": 0}
+
+class RenderGraph:
+    def __init__(self, state, refresh_s=2.0, clock=time.monotonic):
+        self.state = state
+        self.refresh_s = float(refresh_s)
+        self.clock = clock
+        self.groups = {}        # group → [Output]
+        self.seen = {}          # group → StateStore-versie van de vorige tick
+
+    def add(self, group, name, deps, render, live=None):
+        """render(live_value) draws the output; deps are STATE keys, live() the non-STATE inputs."""
+        out = Output(name, deps, render, live)
+        self.groups.setdefault(group, []).append(out)
+        return out
+
+    def invalidate(self, group=None):
+        for g, outs in self.groups.items():
+            if group is None or g == group:
+                for o in outs: o.dirty = True
+
+    def run(self, group):
+        st, now = self.state, self.clock()
+        v = st.version
+        changed = st.changed_since(self.seen[group]) if group in self.seen else None
+        self.seen[group] = v
+        err = None
+        for o in self.groups.get(group, ()):
+            live = o.live() if o.live else None
+            if not (o.dirty or changed is None or not o.deps.isdisjoint(changed)
+                    or live != o.last_live or now - o.last_t >= self.refresh_s):
+                o.stats["skipped"] += 1
+                continue
+            o.dirty, o.last_live, o.last_t = False, live, now
+            o.stats["renders"] += 1
+            try: o.render(live)
+            except Exception as e:              # volgende tick opnieuw; de andere outputs gaan gewoon door
+                o.stats["errors"] += 1; o.dirty = True; err = e
+        if err: raise err
+
+    def stats(self):
+        return {f"{g}:{o.name}": dict(o.stats) for g, outs in self.groups.items() for o in outs}
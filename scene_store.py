@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""Scene/preset library as raw channel arrays: one row of values + one row of mask per scene.
+
+File layout (little endian, version 1):
+    header  "<4sHHIII"  magic b"LSSC", version, 0, frame size, scene count, index length
+    index   JSON: {"names": [...], "fixtures": {fixture: {attr: idx}}, "meta": {name: {...}}}
+    data    at a 64-byte boundary: values[count][size] then mask[count][size], uint8
+
+The data part is memory-mapped, so opening a library of hundreds of scenes reads only the
+header and index. The index keeps the fixture → column map the rows were stored with; a
+different patch gets a remapped copy in memory, the file itself only changes on a save.
+Recall is a masked diff against the live frame: only channels that differ are written.
+"""
+import os, json, time, struct, threading
+import numpy as np
+
+MAGIC, VERSION = b"LSSC", 1
+_HDR = struct.Struct("<4sHHIII")
+_ALIGN = 64
+
+def patch_mask(patch, attrs):
+    """Boolean frame mask of the `attrs` channels of every patched fixture."""
+    m = np.zeros(patch.size, dtype=bool)
+    for name, ch in patch.fixtures.items():
+        for a in attrs:
+            if a in ch: m[ch[a]] = True
+    return m
+
+def merge(parts):
+    """[(values, mask)] → one (values, mask); later parts win where masks overlap."""
+    values, mask = np.zeros_like(parts[0][0]), np.zeros(len(parts[0][0]), dtype=bool)
+    for v, m in parts:
+        values[m] = v[m]; mask |= m
+    return values, mask
+
+class SceneLibrary:
+    """Two copies of the rows: `_rows` in the file's own layout (`_fmap`, the source of truth) and
+    `values`/`mask` remapped to the current patch for recall. Opening or repatching only rebuilds
+    the working copy; the file is rewritten on an explicit save, and then fixture attributes the
+    current patch lacks are kept as extra columns, so a fixture that is missing from the patch
+    for a while (broken or edited fixture file) comes back with its scene data intact."""
+    def __init__(self, path, patch, capture_attrs, legacy=None, writes=None):
+        """`legacy`: JSON file ({name: {fixture: {attr: value}}}) imported when `path` does not exist yet;
+        `writes(fixture, values)` resolves its values (hex etc.) into attribute writes."""
+        self.path, self.patch, self.capture_attrs = path, patch, tuple(capture_attrs)
+        self.size = patch.size
+        self.capture_mask = patch_mask(patch, capture_attrs)
+        self.lock = threading.Lock()
+        self.names, self.meta = [], {}
+        self._fmap = {}                                             # fixture → {attr: kolom} van het bestand
+        self._rows = (np.zeros((0, 0), dtype=np.uint8), np.zeros((0, 0), dtype=bool))
+        self.values = np.zeros((0, self.size), dtype=np.uint8)
+        self.mask = np.zeros((0, self.size), dtype=bool)
+        self.stats = {"scenes": 0, "open_ms": 0.0, "remapped": False, "orphans": 0}
+        t0 = time.perf_counter()
+        if os.path.exists(path): self._open()
+        elif legacy and os.path.exists(legacy):
+            with open(legacy) as f: self.import_dicts(json.load(f), writes)
+        self.stats["open_ms"] = round((time.perf_counter() - t0) * 1000.0, 3)
+
+    # --- bestand ---
+    def _open(self):
+        with open(self.path, "rb") as f:
+            magic, ver, _, width, count, ilen = _HDR.unpack(f.read(_HDR.size))
+            if magic != MAGIC or ver != VERSION: raise ValueError(f"{self.path}: not a v{VERSION} scene library")
+            index = json.loads(f.read(ilen))
+        off = -(-(_HDR.size + ilen) // _ALIGN) * _ALIGN
+        if count:
+            data = np.memmap(self.path, dtype=np.uint8, mode="r", offset=off, shape=(2, count, width))
+            self._rows = (data[0], data[1].view(bool))
+        else:
+            self._rows = (np.zeros((0, width), dtype=np.uint8), np.zeros((0, width), dtype=bool))
+        self.names, self.meta, self._fmap = index["names"], index.get("meta", {}), index["fixtures"]
+        self._derive()
+
+    def _derive(self):
+        """Working copy for the current patch from the file rows (in memory only)."""
+        fv, fm = self._rows
+        self.stats["scenes"] = len(self.names)
+        if self._fmap == self.patch.fixtures and fv.shape[1] == self.size:
+            self.values, self.mask = fv, fm                         # zelfde layout: direct de mapping
+            self.stats["remapped"], self.stats["orphans"] = False, 0
+            return
+        src, dst, orphans = [], [], 0
+        for name, ch in self._fmap.items():
+            new = self.patch.fixtures.get(name, {})
+            for a, i in ch.items():
+                if a in new: src.append(i); dst.append(new[a])
+                else: orphans += 1
+        v = np.zeros((len(fv), self.size), dtype=np.uint8)
+        m = np.zeros((len(fv), self.size), dtype=bool)
+        v[:, dst] = fv[:, src]
+        m[:, dst] = fm[:, src]
+        self.values, self.mask = v, m
+        self.stats["remapped"], self.stats["orphans"] = True, orphans
+
+    def repatch(self, patch):
+        """Fixture config was reloaded: rebuild the working copy for the new patch (same frame size).
+        Memory only: the file keeps its rows until the next explicit save."""
+        with self.lock:
+            self.patch = patch
+            self.capture_mask = patch_mask(patch, self.capture_attrs)
+            self._derive()
+
+    def _save(self):
+        """Write the working copy in the current patch layout, plus the file's columns for fixture
+        attributes the patch does not have (appended after the frame)."""
+        fmap = {fx: dict(ch) for fx, ch in self.patch.fixtures.items()}
+        src, dst, col = [], [], self.size
+        for name, ch in self._fmap.items():
+            for a, i in ch.items():
+                if a not in fmap.get(name, {}):
+                    fmap.setdefault(name, {})[a] = col; src.append(i); dst.append(col); col += 1
+        n, (fv, fm) = len(self.names), self._rows
+        v = np.zeros((n, col), dtype=np.uint8); m = np.zeros((n, col), dtype=bool)
+        v[:, :self.size], m[:, :self.size] = self.values, self.mask
+        k = min(n, len(fv))                                         # nieuwe rijen hebben geen oude kolommen
+        v[:k, dst], m[:k, dst] = fv[:k, src], fm[:k, src]
+        self._write(fmap, v, m)
+        self._fmap, self._rows = fmap, (v, m)
+
+    def _write(self, fmap, values, mask):
+        index = json.dumps({"names": self.names, "fixtures": fmap, "meta": self.meta},
+                           separators=(",", ":")).encode()
+        head = _HDR.pack(MAGIC, VERSION, 0, values.shape[1], len(self.names), len(index)) + index
+        head += b"\x00" * (-len(head) % _ALIGN)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(head)
+            f.write(np.ascontiguousarray(values).tobytes())
+            f.write(mask.astype(np.uint8).tobytes())
+            f.flush(); os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self.stats["scenes"] = len(self.names)
+
+    # --- opslaan ---
+    def _set_row(self, name, values, mask):
+        values = np.where(mask, values, 0).astype(np.uint8)
+        if name in self.names:
+            i = self.names.index(name)
+            if isinstance(self.values, np.memmap) or not self.values.flags.writeable:   # mapping: eerst naar RAM
+                self.values, self.mask = np.array(self.values), np.array(self.mask)
+            self.values[i], self.mask[i] = values, mask
+        else:
+            self.values = np.vstack([self.values, values[None]])
+            self.mask = np.vstack([self.mask, mask[None]])
+            self.names = self.names + [name]                       # als laatste: lezers zonder lock vinden de rij altijd
+
+    def put(self, name, values, mask, meta=None):
+        with self.lock:
+            self._set_row(name, values, mask)
+            self.meta[name] = dict(meta or {}, saved=time.strftime("%Y-%m-%dT%H:%M:%S"))
+            self._save()
+
+    def capture(self, name, frame, meta=None):
+        """Store the capture channels of the live frame."""
+        self.put(name, np.asarray(frame, dtype=np.uint8), self.capture_mask, meta)
+
+    def delete(self, name):
+        with self.lock:
+            keep = [j for j, n in enumerate(self.names) if n != name]
+            fv, fm = self._rows
+            self._rows = (np.array(fv[keep]), np.array(fm[keep]))
+            self.values, self.mask = np.array(self.values[keep]), np.array(self.mask[keep])
+            self.names = [self.names[j] for j in keep]
+            self.meta.pop(name, None)
+            self._save()
+
+    def import_dicts(self, scenes, writes=None):
+        """{name: {fixture: {attr: value}}} (the JSON format) → rows. Only written when every fixture
+        is in the patch: with a broken fixture file the next start imports again."""
+        known = True
+        for name, looks in scenes.items():
+            values, mask = np.zeros(self.size, dtype=np.uint8), np.zeros(self.size, dtype=bool)
+            for fx, vals in looks.items():
+                known &= fx in self.patch.fixtures
+                for idx, v in self.patch.resolve(fx, writes(fx, vals) if writes else vals):
+                    values[idx] = max(0, min(255, int(v))); mask[idx] = True
+            with self.lock: self._set_row(name, values, mask)
+        with self.lock:
+            if known: self._save()
+            else: self._fmap, self._rows = dict(self.patch.fixtures), (self.values, self.mask)
+
+    # --- lezen ---
+    def __contains__(self, name): return name in self.names
+    def __len__(self): return len(self.names)
+    def keys(self): return list(self.names)
+
+    def get(self, name):
+        """(values, mask) rows of one scene (views, do not modify)."""
+        i = self.names.index(name)
+        return self.values[i], self.mask[i]
+
+    def to_dict(self, name):
+        """One scene in the JSON format, from the file rows (so it includes fixtures the patch lacks)."""
+        i = self.names.index(name)
+        values, mask = self._rows[0][i], self._rows[1][i]
+        out = {}
+        for fx, ch in self._fmap.items():
+            obj = {a: int(values[c]) for a, c in ch.items() if mask[c]}
+            if obj: out[fx] = obj
+        return out
+
+    def export(self):
+        """All scenes in the JSON format ({name: {fixture: {attr: value}}})."""
+        return {n: self.to_dict(n) for n in self.names}
+
+def diff(values, mask, live, force=None):
+    """(idx, vals) of the masked channels that differ from `live` (plus masked `force` channels,
+    e.g. ones still fading towards something else)."""
+    m = mask & (values != live)
+    if force is not None: m |= mask & force
+    idx = np.flatnonzero(m)
+    return idx, values[idx]
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Engine tick scheduler on a monotonic deadline grid, plus a tempo-change-safe beat clock.
+
+Each task runs at `start + k * period`, not "period after the previous run ended", so tick
+cost does not stretch the period. A run that ends past its next deadline is an overrun; the
+missed slots are skipped (counted, never run in a burst) and the task stays on its grid.
+All tasks share one thread: a slow WLED or housekeeping task delays a render tick by at most
+its own duration, which shows up as `late_ms`.
+"""
+import time, heapq, threading
+
+class _Task:
+    __slots__ = ("name", "period", "fn", "next", "stats")
+    def __init__(self, name, period, fn, first):
+        self.name, self.period, self.fn, self.next = name, float(period), fn, first
+        self.stats = {"period_ms": round(self.period * 1000.0, 3), "runs": 0, "errors": 0, "overruns": 0,
+                      "skipped": 0, "late_ms_avg": 0.0, "late_ms_max": 0.0, "run_ms_avg": 0.0, "run_ms_max": 0.0}
+
+class TickScheduler:
+    def __init__(self, clock=time.monotonic, on_error=None):
+        self.clock = clock
+        self.on_error = on_error          # fn(name, exc)
+        self.tasks = {}
+        self._heap = []                   # (deadline, seq, task)
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def every(self, name, period, fn, phase=0.0):
+        """Run fn every `period` s; `phase` offsets the grid so tasks with equal rates do not pile up."""
+        t = _Task(name, period, fn, self.clock() + float(phase))
+        with self._cond:
+            self.tasks[name] = t
+            self._push(t)
+            self._cond.notify()
+        return t
+
+    def _push(self, t):
+        self._seq += 1
+        heapq.heappush(self._heap, (t.next, self._seq, t))
+
+    def start(self):
+        if self._thread: return
+        self._thread = threading.Thread(target=self._run, name="engine", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    wait = self._heap[0][0] - self.clock() if self._heap else None
+                    if wait is not None and wait <= 0: break
+                    self._cond.wait(wait)
+                deadline, _, t = heapq.heappop(self._heap)
+            self._step(t, deadline)
+            with self._cond: self._push(t)
+
+    def _step(self, t, deadline):
+        st = t.stats
+        t0 = self.clock()
+        late = (t0 - deadline) * 1000.0
+        try: t.fn()
+        except Exception as e:
+            st["errors"] += 1
+            if self.on_error: self.on_error(t.name, e)
+        end = self.clock()
+        run = (end - t0) * 1000.0
+        st["runs"] += 1
+        st["late_ms_avg"] += (late - st["late_ms_avg"]) * 0.05
+        st["run_ms_avg"] += (run - st["run_ms_avg"]) * 0.05
+        st["late_ms_max"] = max(st["late_ms_max"], late)
+        st["run_ms_max"] = max(st["run_ms_max"], run)
+        t.next = deadline + t.period
+        if end > t.next:                                   # overrun: gemiste slots overslaan, op het raster blijven
+            missed = int((end - t.next) // t.period) + 1
+            st["overruns"] += 1; st["skipped"] += missed
+            t.next += missed * t.period
+
+    def stats(self):
+        return {name: dict(t.stats) for name, t in self.tasks.items()}
+
+    def reset_max(self):
+        for t in self.tasks.values(): t.stats["late_ms_max"] = t.stats["run_ms_max"] = 0.0
+
+class BeatClock:
+    """Beat position that stays continuous when the tempo changes or the audio tracker drops out.
+
+    `beat(t, bpm)` extrapolates from the last anchor; a new bpm re-anchors at the current
+    position instead of rescaling all of t (which would make the phase jump). `follow()` pins
+    the clock to an external beat (the audio tracker) so the fallback continues where it left off.
+    """
+    def __init__(self, bpm=128.0, clock=time.monotonic):
+        self.clock = clock
+        self.bpm = float(bpm)
+        self._t0, self._b0 = clock(), 0.0
+        self._lock = threading.Lock()
+
+    def beat(self, t=None, bpm=None):
+        t = self.clock() if t is None else t
+        with self._lock:
+            if bpm is not None and bpm > 0 and bpm != self.bpm:
+                self._b0 += (t - self._t0) * self.bpm / 60.0
+                self._t0, self.bpm = t, float(bpm)
+            return self._b0 + (t - self._t0) * self.bpm / 60.0
+
+    def follow(self, t, beat, bpm):
+        with self._lock:
+            self._t0, self._b0, self.bpm = t, float(beat), float(bpm)
+
+    def phase(self, t=None, beats=1.0):
+        """0..1 within a cycle of `beats` beats (1 = per beat, 4 = per bar, 16 = per phrase)."""
+        x = self.beat(t) / beats
+        return x - int(x)
+
+    def status(self, t=None):
+        b = self.beat(t)
+        return {"bpm": self.bpm, "beat": round(b, 3), "bar": int(b // 4), "beat_in_bar": int(b % 4),
+                "phase": round(b - int(b), 3)}
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Typed show state with a versioned change journal.
+
+STATE keeps its dict-style interface (`STATE["mode"]`, `STATE["guirlande"]["fx"] = ...`) so
+routes and engines read the same as before, but:
+  - device/lock/include sub-dicts are slotted Section objects with fixed, typed fields;
+  - known top-level scalars (mode, ai_*, band_*) are coerced to their type on write;
+  - every write goes through one lock and bumps `version`, journaling the top-level key;
+  - `changed_since(v)` returns the keys changed after version v without scanning the state.
+Unknown keys (cue status, fx presets, ...) are stored as-is and journaled on assignment.
+"""
+import threading
+from collections import deque
+
+def _conv(t, default):
+    def conv(v):
+        if v is None: return default                    # wissen via de API: default, niet str(None)
+        return t(v)
+    return conv
+
+class Section:
+    """Fixed set of typed fields; item access for the existing dict-style code."""
+    __slots__ = ("_store", "_key")
+    FIELDS = {}     # name → (type, default)
+
+    def __init__(self, store, key, data=None):
+        self._store, self._key = store, key
+        data = data or {}
+        for f, (t, d) in self.FIELDS.items():
+            v = data.get(f, d)
+            try: setattr(self, f, _conv(t, d)(v))
+            except (TypeError, ValueError): setattr(self, f, d)   # kapotte waarde in state.json: default
+
+    def __getitem__(self, k):
+        if k not in self.FIELDS: raise KeyError(k)
+        return getattr(self, k)
+
+    def __setitem__(self, k, v):
+        self._store.set_field(self._key, k, v)
+
+    def get(self, k, default=None):
+        return getattr(self, k) if k in self.FIELDS else default
+
+    def keys(self): return self.FIELDS.keys()
+    def items(self): return [(k, getattr(self, k)) for k in self.FIELDS]
+    def __iter__(self): return iter(self.FIELDS)
+    def __contains__(self, k): return k in self.FIELDS
+    def __len__(self): return len(self.FIELDS)
+    def __repr__(self): return f"{type(self).__name__}({self.to_dict()})"
+
+    def to_dict(self):
+        return {k: getattr(self, k) for k in self.FIELDS}
+
+def section(name, fields):
+    return type(name, (Section,), {"__slots__": tuple(fields), "FIELDS": fields})
+
+_INCLUDE = ("pars_big", "pars_small", "moving_par", "wash_fx", "moving_head", "scanner",
+            "dual_scan", "wled_tubes", "tube_dmx", "guirlande")
+
+Wled      = section("Wled", {"on": (bool, True), "fx": (str, "Solid"), "speed": (int, 120), "intensity": (int, 160)})
+TubeDmx   = section("TubeDmx", {"pattern": (str, "fade_up"), "speed": (int, 64), "strobe": (int, 0), "dim": (int, 160)})
+Strobo    = section("Strobo", {"rate": (int, 0), "dim": (int, 255)})
+ColorLock = section("ColorLock", {"enabled": (bool, False), "hex": (str, "#FFFFFF")})
+Accent    = section("Accent", {"enabled": (bool, True), "hex": (str, "#FFB000"), "pct": (int, 10)})
+Include   = section("Include", {k: (bool, True) for k in _INCLUDE})
+
+class StateStore:
+    SECTIONS = {"guirlande": Wled, "wled_tubes": Wled, "tube_dmx": TubeDmx, "strobo_dmx": Strobo,
+                "ai_color_lock": ColorLock, "band_color_lock": ColorLock, "band_accent": Accent,
+                "ai_include": Include, "band_include": Include}
+    TYPES = {"mode": (str, "ai"), "ai_enabled": (bool, True), "ai_full": (bool, False), "ai_cluster": (str, ""),
+             "ai_sub": (str, None), "ai_bpm": (int, 128), "band_cluster": (str, ""), "band_sub": (str, None),
+             "band_running": (bool, False), "band_paused": (bool, False), "band_palette": (str, ""),
+             "fx_level": (float, 1.0)}
+
+    def __init__(self, data=None, journal=2048):
+        self.lock = threading.RLock()
+        self.version = 0
+        self.journal = deque(maxlen=journal)   # (version, key)
+        self.listeners = []                    # fn() na elke wijziging (bv. StateFeed.poke)
+        self._data = {}
+        for k, v in (data or {}).items():
+            try: self._data[k] = self._wrap(k, v)
+            except (TypeError, ValueError, AttributeError): pass
+
+    def _wrap(self, k, v):
+        cls = self.SECTIONS.get(k)
+        if cls: return cls(self, k, v.to_dict() if isinstance(v, Section) else v)
+        if k in self.TYPES: return _conv(*self.TYPES[k])(v)
+        return v
+
+    # --- lezen (zonder lock: losse attribuut/dict-reads zijn atomair) ---
+    def __getitem__(self, k): return self._data[k]
+    def get(self, k, default=None): return self._data.get(k, default)
+    def __contains__(self, k): return k in self._data
+    def __iter__(self): return iter(list(self._data))
+    def __len__(self): return len(self._data)
+    def keys(self): return list(self._data)
+    def items(self): return list(self._data.items())
+
+    # --- schrijven ---
+    def __setitem__(self, k, v):
+        with self.lock:
+            v = self._wrap(k, v)
+            old = self._data.get(k, _MISSING)
+            if isinstance(v, (str, int, float, bool, type(None))) and type(old) is type(v) and old == v: return
+            self._data[k] = v
+            self._bump(k)
+
+    def __delitem__(self, k):
+        with self.lock:
+            del self._data[k]
+            self._bump(k)
+
+    def update(self, d):
+        with self.lock:
+            for k, v in d.items(): self[k] = v
+
+    def set_field(self, key, field, value):
+        with self.lock:
+            sec = self._data[key]
+            t, d = sec.FIELDS[field]
+            value = _conv(t, d)(value)
+            if getattr(sec, field) == value: return
+            setattr(sec, field, value)
+            self._bump(key)
+
+    def _bump(self, key):
+        self.version += 1
+        self.journal.append((self.version, key))
+        for fn in self.listeners:
+            try: fn()
+            except Exception: pass
+
+    # --- journal ---
+    def changed_since(self, version):
+        """Top-level keys changed after `version`; None when the journal no longer reaches back."""
+        with self.lock:
+            if version >= self.version: return set()
+            if not self.journal or self.journal[0][0] > version + 1: return None
+            keys = set()
+            for v, k in reversed(self.journal):
+                if v <= version: break
+                keys.add(k)
+            return keys
+
+    def to_dict(self, keys=None):
+        """JSON-ready copy of all keys (or of `keys` that still exist), consistent under the lock."""
+        with self.lock:
+            ks = self._data.keys() if keys is None else [k for k in keys if k in self._data]
+            return {k: plain(self._data[k]) for k in ks}
+
+_MISSING = object()
+
+def plain(v):
+    """Section → dict (recursively for containers), for json.dumps."""
+    if isinstance(v, Section): return v.to_dict()
+    if isinstance(v, dict): return {k: plain(x) for k, x in v.items()}
+    if isinstance(v, list): return [plain(x) for x in v]
+    return v
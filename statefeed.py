@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Versioned STATE change feed: one thread diffs STATE per top-level key, readers wait for new versions.
+
+With a StateStore only the keys in its change journal since the last publish are re-encoded;
+a plain dict is diffed in full.
+
+Each change set gets a version number. Readers (SSE clients, the MIDI link) keep their last
+version and call `since(v)`: they get the missed diffs while those are still in the backlog,
+or None when they must resync from `snapshot()`. Versions restart at 1 with every process, so
+`epoch` (the boot time) tells a resuming client whether its version still means anything. Diffs are JSON-encoded once, so fan-out
+costs nothing per client and no request thread ever touches another client's connection.
+"""
+import json, time, threading
+from collections import deque
+
+class StateFeed:
+    def __init__(self, state, interval=0.1, backlog=256):
+        self.state = state
+        self.interval = float(interval)
+        self.version = 0
+        self.closed = False                         # shutdown: readers wachten niet meer
+        self.epoch = format(time.time_ns() // 1000000, "x")    # per proces: versies van een vorige run zijn ongeldig
+        self.log = deque(maxlen=backlog)            # (version, diff-dict, json-text)
+        self._enc = {}                              # key → json van de laatst gepubliceerde waarde
+        self._seen = None                           # StateStore-versie van de laatste publish
+        self._cond = threading.Condition()
+        self._poke = threading.Event()
+        self._thread = None
+        self.stats = {"diffs": 0, "keys_changed": 0, "keys_encoded": 0, "diff_ms_last": 0.0, "diff_ms_max": 0.0}
+
+    def poke(self):
+        """Hint that STATE changed; the feed diffs right away instead of at the next interval."""
+        self._poke.set()
+
+    def snapshot(self):
+        """(version, {key: value}) consistent with the diffs that follow it."""
+        with self._cond:
+            return self.version, {k: json.loads(v) for k, v in self._enc.items()}
+
+    def since(self, version, timeout=None):
+        """Diffs after `version` as [(v, diff, text)], [] on timeout or close, None when a resync is needed."""
+        with self._cond:
+            if self.version == version and not self.closed:
+                self._cond.wait(timeout)
+            if self.version == version: return []
+            if version > self.version or not self.log or self.log[0][0] > version + 1: return None
+            return [e for e in self.log if e[0] > version]
+
+    def close(self):
+        """Shutdown: wake every waiting reader and stop blocking, so SSE streams can end."""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def _current(self):
+        """(encoded values to compare, keys that were looked at; None = everything)."""
+        st = self.state
+        if not hasattr(st, "changed_since"):
+            return {k: v for k, v in list(st.items())}, None
+        v = st.version
+        keys = st.changed_since(self._seen) if self._seen is not None else None
+        self._seen = v
+        return st.to_dict(keys), keys
+
+    def publish(self):
+        t0 = time.perf_counter()
+        values, keys = self._current()
+        cur = {k: json.dumps(v, sort_keys=True, separators=(",", ":")) for k, v in values.items()}
+        self.stats["keys_encoded"] += len(cur)
+        with self._cond:
+            changed = {k: v for k, v in cur.items() if self._enc.get(k) != v}
+            removed = [k for k in (self._enc if keys is None else keys) if k in self._enc and k not in cur]
+            if changed or removed:
+                self.version += 1
+                diff = {"v": self.version, "set": {k: json.loads(v) for k, v in changed.items()}}
+                if removed: diff["del"] = removed
+                self._enc.update(changed)
+                for k in removed: self._enc.pop(k, None)
+                self.log.append((self.version, diff, json.dumps(diff, separators=(",", ":"))))
+                self.stats["diffs"] += 1; self.stats["keys_changed"] += len(changed) + len(removed)
+                self._cond.notify_all()
+        ms = (time.perf_counter() - t0) * 1000.0
+        self.stats["diff_ms_last"] = ms
+        self.stats["diff_ms_max"] = max(self.stats["diff_ms_max"], ms)
+
+    def start(self):
+        if self._thread: return
+        if hasattr(self.state, "listeners"): self.state.listeners.append(self.poke)
+        self.publish()
+        self._thread = threading.Thread(target=self._run, name="state-feed", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            self._poke.wait(self.interval)
+            time.sleep(0.01)                        # bundel writes van dezelfde request
+            self._poke.clear()
+            try: self.publish()
+            except Exception: pass                  # dict veranderde tijdens dump: volgende ronde
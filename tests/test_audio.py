@@ -0,0 +1,11 @@
+import sys
+from audio import AudioWorker
+
+def test_missing_sounddevice_stops_the_worker_once(monkeypatch, capsys):
+    monkeypatch.setitem(sys.modules, "sounddevice", None)      # import faalt zoals op een kale install
+    w = AudioWorker({"source": "default"})
+    w.start(); w._thread.join(1.0)
+    assert not w._thread.is_alive()
+    assert w.stats["errors"] == 1 and not w.stats["running"]
+    assert "sounddevice" in w.stats["error"]
+    assert capsys.readouterr().err.count("audio:") == 1
@@ -0,0 +1,18 @@
+import random
+from color_match import ColorIndex
+
+WHEEL = [("#FFFFFF", 0), ("#FF0000", 10), ("#00FF00", 20), ("#0000FF", 30), ("#FFFF00", 40),
+         ("#FF8000", 50), ("#00FFFF", 60), ("#FF00FF", 70), ("#80FF80", 80)]
+
+def test_lut_agrees_with_exact_scan():
+    rnd = random.Random(7)
+    for metric in ("rgb", "lab"):
+        ci = ColorIndex(WHEEL, metric)
+        assert ci.mixed > 0                                  # er zijn grenscellen, die gaan naar exact()
+        for _ in range(5000):
+            h = "#%06X" % rnd.getrandbits(24)
+            assert ci.lookup(h) == ci.exact(h), (metric, h)
+
+def test_wheel_colours_map_to_their_own_slot():
+    ci = ColorIndex(WHEEL)
+    assert [ci.lookup(h) for h, _ in WHEEL] == [v for _, v in WHEEL]
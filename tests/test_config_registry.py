@@ -0,0 +1,29 @@
+import os, json
+from config_registry import ConfigRegistry, ConfigError, check_object
+
+def write(path, text):
+    with open(path, "w") as f: f.write(text)
+    st = os.stat(path); os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))   # zelfde grootte: mtime moet verschillen
+    st = os.stat(path); os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))   # mtime zeker anders
+
+def test_swap_hooks_get_the_new_value(tmp_path):
+    write(tmp_path / "a.json", json.dumps({"x": 1}))
+    reg = ConfigRegistry(str(tmp_path))
+    assert reg.register("a", "a.json", {}, check_object) == {"x": 1}
+    seen = []
+    reg.on_swap("a", seen.append)
+    write(tmp_path / "a.json", json.dumps({"x": 2}))
+    assert reg.check() == ["a"]
+    assert seen == [{"x": 2}] and reg["a"] == {"x": 2} and reg.status()["a"]["version"] == 1
+
+def test_bad_file_or_failing_hook_keeps_the_previous_value(tmp_path):
+    write(tmp_path / "a.json", json.dumps({"x": 1}))
+    reg = ConfigRegistry(str(tmp_path))
+    reg.register("a", "a.json", {}, check_object)
+    write(tmp_path / "a.json", "{not json")
+    assert reg.check() == [] and reg["a"] == {"x": 1} and reg.status()["a"]["error"]
+    def hook(v): raise ConfigError("nope")
+    reg.on_swap("a", hook)
+    write(tmp_path / "a.json", json.dumps({"x": 3}))
+    assert reg.check() == [] and reg["a"] == {"x": 1}
+    assert reg.stats["rejected"] == 2
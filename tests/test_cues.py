@@ -0,0 +1,30 @@
+import time
+from cues import CuePlayer
+
+def wait_for(cond, timeout=1.0):
+    end = time.monotonic() + timeout
+    while not cond() and time.monotonic() < end: time.sleep(0.005)
+    return cond()
+
+def player(songs):
+    fired = []
+    p = CuePlayer(songs, lambda song, i, cue: fired.append((song, i)))
+    p.start()
+    return p, fired
+
+def test_back_without_song_is_noop_and_player_keeps_running():
+    p, fired = player({"s": {"cues": [{"label": "a"}, {"label": "b"}]}})
+    assert p.back() is False
+    p.load("s"); p.go()
+    assert wait_for(lambda: fired == [("s", 0)])
+
+def test_song_shortened_while_follow_pending():
+    p, fired = player({"s": {"cues": [{"follow": 0.05}, {}]}})
+    p.load("s"); p.go()
+    assert wait_for(lambda: len(fired) == 1)
+    p.songs = {"s": {"cues": [{}]}}           # config reload: cue 1 bestaat niet meer
+    assert wait_for(lambda: p.stats["dropped"] == 1)
+    p.go()                                     # index 0 is de laatste: niets meer
+    p.load("s"); p.go()
+    assert wait_for(lambda: len(fired) == 2)
+    assert p._thread.is_alive()
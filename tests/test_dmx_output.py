@@ -0,0 +1,43 @@
+import time
+from dmx_output import DmxOutput
+
+class Recorder:
+    def __init__(self): self.frames = []
+    def send(self, univ, frame): self.frames.append((time.monotonic(), univ, frame))
+
+class Overlay:
+    """Stand-in for EffectEngine: channel 0 at 200 while busy."""
+    busy = False
+    def render(self, out, now): out[0] = 200
+
+def wait_for(cond, timeout=1.0):
+    end = time.monotonic() + timeout
+    while not cond() and time.monotonic() < end: time.sleep(0.005)
+    return cond()
+
+def output(**kw):
+    rec = Recorder()
+    dmx = DmxOutput([rec], **kw)
+    dmx.start()
+    assert wait_for(lambda: rec.frames)                # eerste keep-alive frame
+    return dmx, rec
+
+def test_effect_start_and_clear_go_out_without_waiting_for_keepalive():
+    dmx, rec = output(refresh_hz=100, keepalive_s=30.0)
+    dmx.overlay = ov = Overlay()
+    ov.busy = True; dmx.mark_dirty()
+    assert wait_for(lambda: rec.frames[-1][2][0] == 200, 0.5)
+    ov.busy = False; dmx.mark_dirty()
+    assert wait_for(lambda: rec.frames[-1][2][0] == 0, 0.5)
+
+def test_writes_coalesce_and_unchanged_universes_wait_for_keepalive():
+    dmx, rec = output(universes=(0, 1), refresh_hz=20, keepalive_s=0.3)
+    n = len(rec.frames)
+    for v in range(1, 6): dmx.write([(512 + 3, v)])         # vijf writes binnen één periode
+    assert wait_for(lambda: len(rec.frames) > n)
+    time.sleep(0.1)
+    changed = rec.frames[n:]
+    assert [(u, f[3]) for _, u, f in changed] == [(1, 5)]  # één frame, alleen universe 1
+    assert dmx.stats["frames_coalesced"] >= 4
+    assert wait_for(lambda: {u for _, u, _ in rec.frames[n + 1:]} == {0, 1}, 0.5)   # keep-alive: allebei
+    assert dmx.stats["keepalive_frames"] >= 2
@@ -0,0 +1,12 @@
+from midi.midi_utils import CCCoalescer
+
+def test_coalescer_rate_limits_and_delivers_the_resting_value():
+    sent = []
+    cc = CCCoalescer(lambda action, value: sent.append(value), max_rate_hz=10)
+    cc.push("fader1", "dim", 10); assert cc.flush(now=0.0) is None
+    for v in (20, 30, 40): cc.push("fader1", "dim", v)
+    assert abs(cc.flush(now=0.05) - 0.05) < 1e-9           # binnen 100 ms: uitgesteld
+    assert cc.flush(now=0.1) is None
+    cc.push("fader1", "dim", 40); cc.flush(now=0.5)        # zelfde waarde: niet opnieuw
+    assert sent == [10, 40]
+    assert cc.stats == {"in": 5, "sent": 2, "collapsed": 2, "unchanged": 1}
@@ -0,0 +1,42 @@
+import copy
+import numpy as np
+from patch import FixturePatch
+from scene_store import SceneLibrary
+
+ATTRS = ("pan", "tilt", "dim")
+FIXTURES = {"fixtures": {"mh_L": {"start": 1, "ch": {"pan": 1, "tilt": 2, "dim": 3}},
+                         "par_1": {"start": 20, "ch": {"dim": 1}}}}
+
+def frame(patch, **vals):
+    f = np.zeros(patch.size, dtype=np.uint8)
+    for key, v in vals.items():
+        fx, attr = key.split("__")
+        f[patch.fixtures[fx][attr]] = v
+    return f
+
+def test_scene_survives_restart_with_broken_fixture_file(tmp_path):
+    path = str(tmp_path / "scenes.lss")
+    good = FixturePatch(FIXTURES)
+    SceneLibrary(path, good, ATTRS).capture("s1", frame(good, mh_L__pan=10, mh_L__dim=200, par_1__dim=50))
+    before = open(path, "rb").read()
+    broken = SceneLibrary(path, FixturePatch({}), ATTRS)       # fixtures_full.json onleesbaar: lege default
+    assert broken.to_dict("s1")["mh_L"]["dim"] == 200
+    assert open(path, "rb").read() == before                  # openen schrijft niets
+    lib = SceneLibrary(path, good, ATTRS)
+    assert lib.to_dict("s1") == {"mh_L": {"pan": 10, "tilt": 0, "dim": 200}, "par_1": {"dim": 50}}
+
+def test_fixture_removed_then_restored_keeps_its_scene_data(tmp_path):
+    path = str(tmp_path / "scenes.lss")
+    good = FixturePatch(FIXTURES)
+    lib = SceneLibrary(path, good, ATTRS)
+    lib.capture("s1", frame(good, mh_L__pan=10, mh_L__dim=200, par_1__dim=50))
+    cut = copy.deepcopy(FIXTURES); del cut["fixtures"]["mh_L"]
+    before = open(path, "rb").read()
+    lib.repatch(FixturePatch(cut))
+    assert open(path, "rb").read() == before                  # hot reload schrijft niets
+    lib.capture("s2", frame(lib.patch, par_1__dim=99))       # opslaan zonder mh_L in de patch
+    lib.repatch(good)
+    assert lib.to_dict("s1")["mh_L"] == {"pan": 10, "tilt": 0, "dim": 200}
+    values, mask = lib.get("s1")
+    assert mask[good.fixtures["mh_L"]["dim"]] and values[good.fixtures["mh_L"]["dim"]] == 200
+    assert SceneLibrary(path, good, ATTRS).to_dict("s1")["mh_L"]["dim"] == 200
@@ -0,0 +1,31 @@
+import os, sys, json, time, socket, signal, subprocess, http.client
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0)); return s.getsockname()[1]
+
+def test_sigterm_saves_dirty_state_with_sse_client_open(tmp_path):
+    port = free_port()
+    settings = {"dmx_output": {"backend": "none"}, "wled": {}, "wled_realtime": {"enabled": False},
+                "audio": {"enabled": False}, "midi_link": {"enabled": False},
+                "server": {"host": "127.0.0.1", "port": port}, "state_flush_s": 60}
+    env = dict(os.environ, LIGHTSHOW_DATA=str(tmp_path), LIGHTSHOW_SETTINGS=json.dumps(settings))
+    p = subprocess.Popen([sys.executable, os.path.join(ROOT, "app.py")], cwd=ROOT, env=env)
+    try:
+        for _ in range(200):
+            try: socket.create_connection(("127.0.0.1", port), 0.2).close(); break
+            except OSError: time.sleep(0.05)
+        sse = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        sse.request("GET", "/api/state/stream"); sse.getresponse().read1(64)
+        c = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        c.request("POST", "/api/mode", json.dumps({"mode": "band"}), {"Content-Type": "application/json"})
+        c.getresponse().read()
+        t0 = time.monotonic()
+        p.send_signal(signal.SIGTERM)
+        p.wait(10)
+        assert time.monotonic() - t0 < 3.0          # ruim binnen TimeoutStopSec
+        with open(tmp_path / "state.json") as f: assert json.load(f)["mode"] == "band"
+    finally:
+        if p.poll() is None: p.kill()
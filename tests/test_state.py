@@ -0,0 +1,17 @@
+from state import StateStore
+
+def test_none_clears_typed_keys_to_their_default():
+    st = StateStore({"ai_cluster": "techno", "band_palette": "warm", "ai_sub": "peak"})
+    st["ai_cluster"] = None; st["band_palette"] = None; st["ai_sub"] = None
+    assert st["ai_cluster"] == "" and st["band_palette"] == "" and st["ai_sub"] is None
+    st["guirlande"] = {"fx": "Rainbow"}
+    st["guirlande"]["fx"] = None
+    assert st["guirlande"]["fx"] == "Solid"
+
+def test_changed_since_reports_written_keys():
+    st = StateStore({"mode": "ai"})
+    v = st.version
+    st["mode"] = "band"; st["ai_bpm"] = 140
+    assert st.changed_since(v) == {"mode", "ai_bpm"}
+    st["mode"] = "band"                               # zelfde waarde: geen nieuwe versie
+    assert st.changed_since(st.version) == set()
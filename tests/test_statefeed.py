@@ -0,0 +1,35 @@
+import threading, time
+from statefeed import StateFeed
+
+def test_since_returns_missed_diffs_and_deletions():
+    st = {"mode": "ai", "bpm": 128}
+    feed = StateFeed(st)
+    feed.publish()
+    v0, snap = feed.snapshot()
+    assert snap == {"mode": "ai", "bpm": 128}
+    st["mode"] = "band"; feed.publish()
+    del st["bpm"]; feed.publish()
+    diffs = feed.since(v0, 0)
+    assert [d for _, d, _ in diffs] == [{"v": v0 + 1, "set": {"mode": "band"}}, {"v": v0 + 2, "set": {}, "del": ["bpm"]}]
+    assert feed.since(feed.version, 0) == []
+
+def test_resync_when_backlog_is_gone_or_version_is_from_the_future():
+    st = {"n": 0}
+    feed = StateFeed(st, backlog=4)
+    feed.publish()
+    for i in range(1, 10): st["n"] = i; feed.publish()
+    assert feed.since(1, 0) is None
+    assert feed.since(feed.version + 5, 0) is None
+
+def test_epoch_differs_per_feed_instance():
+    a = StateFeed({}); time.sleep(0.002); b = StateFeed({})
+    assert a.epoch != b.epoch
+
+def test_close_wakes_a_waiting_reader():
+    feed = StateFeed({"x": 1})
+    feed.publish()
+    got = []
+    t = threading.Thread(target=lambda: got.append(feed.since(feed.version, 10.0)))
+    t.start(); time.sleep(0.05)
+    feed.close(); t.join(1.0)
+    assert got == [[]] and not t.is_alive()
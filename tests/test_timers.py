@@ -0,0 +1,25 @@
+import time
+from timers import TimerWheel
+
+def wait_for(cond, timeout=1.0):
+    end = time.monotonic() + timeout
+    while not cond() and time.monotonic() < end: time.sleep(0.005)
+    return cond()
+
+def test_same_key_rearms_one_timer():
+    tw = TimerWheel(tick=0.005); tw.start()
+    fired = []
+    for i in range(5): tw.schedule(0.03, lambda i=i: fired.append(i), key="pad1")
+    assert wait_for(lambda: fired)
+    time.sleep(0.05)
+    assert fired == [4] and tw.stats["replaced"] == 4
+
+def test_cancel_and_delay_past_one_rotation():
+    tw = TimerWheel(tick=0.002, slots=8); tw.start()
+    fired = []
+    tw.schedule(0.01, lambda: fired.append("x"), key="x")
+    assert tw.cancel("x") and not tw.cancel("x")
+    t0 = time.monotonic()
+    tw.schedule(0.05, lambda: fired.append(time.monotonic() - t0))   # 25 ticks: drie rondes over 8 slots
+    assert wait_for(lambda: fired)
+    assert fired[0] >= 0.045
@@ -0,0 +1,38 @@
+import json, time, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from wled_output import WledSender
+
+def wait_for(cond, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not cond() and time.monotonic() < end: time.sleep(0.005)
+    return cond()
+
+def fake_wled():
+    posts = []
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            posts.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+            self.send_response(200); self.send_header("Content-Length", "0"); self.end_headers()
+        def log_message(self, *a): pass
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{srv.server_port}/json/state", posts
+
+def test_same_payload_is_skipped_until_refresh_then_resent():
+    url, posts = fake_wled()
+    w = WledSender(refresh_s=0.3)
+    w.submit("g", url, {"on": True})
+    assert wait_for(lambda: len(posts) == 1)
+    w.submit("g", url, {"on": True})                   # ongewijzigd binnen refresh_s
+    assert w.stats()["g"]["unchanged"] == 1
+    time.sleep(0.35)
+    w.submit("g", url, {"on": True})                   # keep-alive: opnieuw (WLED kan herstart zijn)
+    assert wait_for(lambda: len(posts) == 2)
+
+def test_unreachable_device_backs_off_and_keeps_the_latest_value():
+    w = WledSender(timeout=0.05, backoff_min=1.0)
+    w.submit("g", "http://127.0.0.1:9/json/state", {"on": True})
+    assert wait_for(lambda: w.stats()["g"]["errors"] >= 1)
+    w.submit("g", "http://127.0.0.1:9/json/state", {"on": False})
+    st = w.stats()["g"]
+    assert not st["online"] and st["backoff_s"] == 1.0 and st["replaced"] == 1
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Hashed timer wheel for short engine-side timers (momentary releases, hit decays).
+
+`schedule(delay, fn, key)` is O(1); scheduling again with the same key replaces the pending
+timer, so a burst of hits on one pad keeps re-arming a single release instead of queueing.
+Callbacks run on the wheel thread and must be quick (a DMX write, a state flag).
+"""
+import math, time, threading, itertools
+
+class TimerWheel:
+    def __init__(self, tick=0.01, slots=256):
+        self.tick = float(tick)
+        self.slots = [dict() for _ in range(slots)]   # key → [rounds, fn]
+        self.where = {}                               # key → slot
+        self.cursor = 0
+        self.lock = threading.Lock()
+        self._ids = itertools.count()
+        self._thread = None
+        self.stats = {"scheduled": 0, "replaced": 0, "fired": 0, "errors": 0, "late_ms_max": 0.0}
+
+    def schedule(self, delay, fn, key=None):
+        ticks = max(1, math.ceil(float(delay) / self.tick))
+        key = next(self._ids) if key is None else key
+        n = len(self.slots)
+        with self.lock:
+            if self._cancel(key): self.stats["replaced"] += 1
+            slot = (self.cursor + ticks) % n
+            self.slots[slot][key] = [(ticks - 1) // n, fn]
+            self.where[key] = slot
+            self.stats["scheduled"] += 1
+        return key
+
+    def cancel(self, key):
+        with self.lock: return self._cancel(key)
+
+    def _cancel(self, key):
+        slot = self.where.pop(key, None)
+        if slot is None: return False
+        self.slots[slot].pop(key, None)
+        return True
+
+    def start(self):
+        if self._thread: return
+        self._thread = threading.Thread(target=self._run, name="timer-wheel", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        nxt = time.monotonic()
+        while True:
+            nxt += self.tick
+            wait = nxt - time.monotonic()
+            if wait > 0: time.sleep(wait)
+            elif -wait > 1.0: nxt = time.monotonic()          # klok/VM hing: niet inhalen
+            due = []
+            with self.lock:
+                self.cursor = (self.cursor + 1) % len(self.slots)
+                bucket = self.slots[self.cursor]
+                for key, ent in list(bucket.items()):
+                    if ent[0] > 0: ent[0] -= 1; continue
+                    del bucket[key]; self.where.pop(key, None)
+                    due.append(ent[1])
+            if not due: continue
+            self.stats["late_ms_max"] = max(self.stats["late_ms_max"], (time.monotonic() - nxt) * 1000.0)
+            for fn in due:
+                try: fn(); self.stats["fired"] += 1
+                except Exception: self.stats["errors"] += 1
@@ -89,20 +89,28 @@ function applyGroupPreset(){
 }
 
 /* ---------- Manual (per fixture) ---------- */
-let FIX_CACHE=[];
+let FIX_CACHE=[], FIX_GROUPS={};
 function manualInit(){
   fetch('/api/fixtures').then(r=>r.json()).then(j=>{
-    FIX_CACHE=j.fixtures||[];
+    FIX_CACHE=j.fixtures||[]; FIX_GROUPS=j.groups||{};
     let sel=document.getElementById('man-fixture'); sel.innerHTML="";
     FIX_CACHE.forEach(f=>{ let o=document.createElement('option'); o.value=f.name; o.text=f.name; sel.appendChild(o); });
+    Object.keys(FIX_GROUPS).forEach(g=>{ let o=document.createElement('option'); o.value='group:'+g; o.text='[groep] '+g; sel.appendChild(o); });
     sel.onchange=onFixtureChange; onFixtureChange();
     // ook de Fixtures-tab dropdown vullen
     const fxsel=document.getElementById('fixture-select'); if(fxsel){ fxsel.innerHTML=""; FIX_CACHE.forEach(f=>{ let o=document.createElement('option'); o.value=f.name; o.text=f.name; fxsel.appendChild(o); });}
   });
 }
+function selCaps(name){
+  // groep: caps = unie van de leden, gobo-keuzes van het eerste lid met gobo
+  const names=name.startsWith('group:') ? (FIX_GROUPS[name.slice(6)]||[]) : [name];
+  const fxs=FIX_CACHE.filter(x=>names.includes(x.name)); if(!fxs.length) return null;
+  const caps={}; fxs.forEach(f=>Object.entries(f.caps).forEach(([k,v])=>{ caps[k]=caps[k]||v; }));
+  return {caps, gobo_choices:(fxs.find(f=>(f.gobo_choices||[]).length)||fxs[0]).gobo_choices};
+}
 function onFixtureChange(){
   let name=document.getElementById('man-fixture').value;
-  let fx=FIX_CACHE.find(x=>x.name===name); if(!fx) return; let c=fx.caps;
+  let fx=selCaps(name); if(!fx) return; let c=fx.caps;
   document.getElementById('ctl-pan').style.display   = c.pan  ? '' : 'none';
   document.getElementById('ctl-tilt').style.display  = c.tilt ? '' : 'none';
   document.getElementById('ctl-dim').style.display   = c.dim  ? '' : 'none';
@@ -117,10 +125,22 @@ function onFixtureChange(){
   (fx.gobo_choices||[]).forEach(k=>{ let o=document.createElement('option'); o.value=lookupGoboValue(k); o.text=k; gsel.appendChild(o); });
 }
 function lookupGoboValue(name){ const t={"open":0,"dot":32,"beam":64,"star":96,"circle":64,"triangle":96}; return t[name]||0; }
+// slider-wijzigingen verzamelen en per ~50 ms als één batch versturen (één request, één DMX-frame)
+let FX_PENDING={}, fxTimer=null, fxBusy=false;
 function fxSet(key,val){
   let name=document.getElementById('man-fixture').value;
   if(['pan','tilt','dim','strobe','r','g','b','w','gobo'].includes(key)) val=parseInt(val,10);
-  fetch('/api/fixture/set',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({name,values:{[key]:val}})});
+  (FX_PENDING[name]=FX_PENDING[name]||{})[key]=val;
+  if(!fxTimer) fxTimer=setTimeout(fxFlush,50);
+}
+function fxFlush(){
+  fxTimer=null;
+  if(fxBusy){ fxTimer=setTimeout(fxFlush,50); return; }   // max. één batch onderweg
+  const set=FX_PENDING; FX_PENDING={};
+  if(!Object.keys(set).length) return;
+  fxBusy=true;
+  fetch('/api/fixture/batch',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({set})})
+    .finally(()=>{ fxBusy=false; });
 }
 
 /* ---------- Fixtures (offsets) ---------- */
@@ -138,12 +158,33 @@ function sceneSave(){ let nm=document.getElementById('scene-name').value||'Scene
   fetch('/api/scene/save',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({name:nm})}); }
 function sceneLoad(){ let nm=document.getElementById('scene-load-name').value||'Scene A';
   fetch('/api/scene/load',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({name:nm})}); }
+function sceneDelete(){ let nm=document.getElementById('scene-load-name').value; if(!nm) return;
+  fetch('/api/scene/delete',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({name:nm})}); }
 
 /* ---------- Force / Logs / Settings ---------- */
 function forceSet(n){ fetch('/api/force',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({set:n})})
   .then(r=>r.json()).then(j=>{document.getElementById("force-status").innerText="Set "+n;}); }
-function refreshLogs(){ fetch('/api/state').then(r=>r.json()).then(st=>{ document.getElementById('logbox').innerText=JSON.stringify(st,null,2); }); }
-setInterval(refreshLogs, 2000);
+function refreshLogs(){ fetch('/api/state').then(r=>r.json()).then(st=>{ STATE=st; renderState(); }); }
+
+/* ---------- Live state (SSE: snapshot + versioned diffs, geen polling) ---------- */
+let STATE={}, stateV=0, stateES=null, stateDraw=false;
+function renderState(){
+  if(stateDraw) return; stateDraw=true;
+  requestAnimationFrame(()=>{ stateDraw=false; document.getElementById('logbox').innerText=JSON.stringify(STATE,null,2); });
+}
+function connectState(){
+  if(!window.EventSource){ refreshLogs(); setInterval(refreshLogs, 2000); return; }
+  if(stateES) stateES.close();
+  stateES=new EventSource('/api/state/stream');
+  stateES.addEventListener('snapshot',e=>{ const m=JSON.parse(e.data); STATE=m.state; stateV=m.v; renderState(); });
+  stateES.addEventListener('diff',e=>{
+    const m=JSON.parse(e.data);
+    if(m.v<=stateV) return;
+    if(m.v!==stateV+1){ connectState(); return; }   // versie gemist: nieuwe verbinding → snapshot
+    Object.assign(STATE,m.set); (m.del||[]).forEach(k=>delete STATE[k]); stateV=m.v; renderState();
+  });
+}
+connectState();
 function safeShutdown(){ fetch("/api/safe_shutdown",{method:"POST"}); }
 
 /* ---------- MIDI learn toggles (placeholder) ---------- */
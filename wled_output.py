@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Background WLED sender: one latest-value-wins slot and one keep-alive session per controller."""
+import time, threading
+import requests
+from requests.adapters import HTTPAdapter
+
+class _Device:
+    def __init__(self, name, url, owner):
+        self.name, self.url, self.owner = name, url, owner
+        self.cv = threading.Condition()
+        self.pending = None
+        self.last_sent = None
+        self.last_ok = 0.0
+        self.backoff = 0.0
+        self.down_until = 0.0
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=0))
+        self.stats = {"sent": 0, "unchanged": 0, "replaced": 0, "errors": 0, "ms_last": 0.0, "ms_max": 0.0, "online": True}
+        threading.Thread(target=self._run, name=f"wled-{name}", daemon=True).start()
+
+    def submit(self, url, payload):
+        with self.cv:
+            self.url = url
+            if payload == self.pending or (self.pending is None and payload == self.last_sent
+                                           and time.monotonic() - self.last_ok < self.owner.refresh_s):
+                self.stats["unchanged"] += 1
+                return
+            if self.pending is not None: self.stats["replaced"] += 1
+            self.pending = payload
+            self.cv.notify()
+
+    def _run(self):
+        o = self.owner
+        while True:
+            with self.cv:
+                while self.pending is None or time.monotonic() < self.down_until:
+                    self.cv.wait(None if self.pending is None else self.down_until - time.monotonic())
+                payload, url = self.pending, self.url
+                self.pending = None
+            t0 = time.perf_counter()
+            try:
+                self.session.post(url, json=payload, timeout=o.timeout).close()
+                ok = True
+            except Exception:
+                ok = False
+            ms = (time.perf_counter() - t0) * 1000.0
+            if o.observe: o.observe(self.name, ms, ok)
+            with self.cv:
+                st = self.stats
+                st["ms_last"] = ms; st["ms_max"] = max(st["ms_max"], ms)
+                if ok:
+                    st["sent"] += 1; st["online"] = True
+                    self.last_sent, self.last_ok, self.backoff = payload, time.monotonic(), 0.0
+                else:
+                    # unreachable: laatste waarde bewaren en exponentieel terugvallen
+                    st["errors"] += 1; st["online"] = False
+                    self.last_sent = None
+                    if self.pending is None: self.pending = payload
+                    self.backoff = min(o.backoff_max, max(o.backoff_min, self.backoff * 2))
+                    self.down_until = time.monotonic() + self.backoff
+
+class WledSender:
+    def __init__(self, timeout=0.25, backoff_min=0.5, backoff_max=8.0, refresh_s=10.0, observe=None):
+        self.timeout, self.backoff_min, self.backoff_max, self.refresh_s = timeout, backoff_min, backoff_max, refresh_s
+        self.observe = observe          # optioneel: observe(device, ms, ok) na elke POST
+        self._devices = {}
+        self._lock = threading.Lock()
+
+    def submit(self, name, url, payload):
+        """Queue payload for device `name`; never blocks on the network."""
+        dev = self._devices.get(name)
+        if dev is None:
+            with self._lock:
+                dev = self._devices.get(name) or self._devices.setdefault(name, _Device(name, url, self))
+        dev.submit(url, payload)
+
+    def stats(self):
+        return {n: dict(d.stats, backoff_s=d.backoff) for n, d in self._devices.items()}
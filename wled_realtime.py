@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""WLED realtime UDP output (DRGB / DNRGB) for pixel frames rendered in Python.
+
+Run `python wled_realtime.py --listen 21324` for a local stand-in that decodes
+incoming packets and prints the received frame rate per sender.
+"""
+import sys, time, socket, threading
+
+WLED_UDP_PORT = 21324
+DRGB, DNRGB = 2, 4
+DRGB_MAX = 490          # LEDs per DRGB packet
+DNRGB_MAX = 489         # LEDs per DNRGB packet (2 bytes start index)
+
+def pack_frames(pixels, timeout=2):
+    """Encode an RGB byte buffer (3 bytes per LED) into one or more WLED realtime packets."""
+    data = bytes(pixels)
+    n = len(data) // 3
+    timeout = max(1, min(255, int(timeout)))
+    if n <= DRGB_MAX:
+        return [bytes((DRGB, timeout)) + data[:n * 3]]
+    out = []
+    for start in range(0, n, DNRGB_MAX):
+        chunk = data[start * 3:min(n, start + DNRGB_MAX) * 3]
+        out.append(bytes((DNRGB, timeout, start >> 8, start & 0xFF)) + chunk)
+    return out
+
+def decode_packet(pkt):
+    """Inverse of pack_frames for one packet → (protocol, start_led, rgb_bytes)."""
+    proto = pkt[0]
+    if proto == DRGB:  return proto, 0, pkt[2:]
+    if proto == DNRGB: return proto, (pkt[2] << 8) | pkt[3], pkt[4:]
+    return proto, 0, b""
+
+class WledRealtime:
+    """Streams frames at a fixed rate; `render(name, t, leds)` returns RGB bytes or None (= skip)."""
+    def __init__(self, devices, render, fps=40, timeout_s=2, port=WLED_UDP_PORT):
+        # devices: {name: {"host": ip, "leds": n, "port": optional}}
+        self.devices = {n: (d["host"], int(d.get("port", port)), int(d.get("leds", 60)))
+                        for n, d in (devices or {}).items() if d.get("host")}
+        self.render = render
+        self.period = 1.0 / max(1.0, float(fps))
+        self.timeout_s = timeout_s
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.stats = {"frames": 0, "packets": 0, "bytes": 0, "errors": 0, "overruns": 0, "render_ms_max": 0.0}
+        self._thread = None
+
+    def send(self, name, pixels):
+        host, port, _ = self.devices[name]
+        for pkt in pack_frames(pixels, self.timeout_s):
+            self.sock.sendto(pkt, (host, port))
+            self.stats["packets"] += 1; self.stats["bytes"] += len(pkt)
+
+    def start(self):
+        if self._thread: return
+        self._thread = threading.Thread(target=self._run, name="wled-realtime", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        nxt = time.monotonic()
+        while True:
+            t0 = time.perf_counter()
+            for name, (_, _, leds) in self.devices.items():
+                try:
+                    px = self.render(name, nxt, leds)
+                    if px is not None:
+                        self.send(name, px); self.stats["frames"] += 1
+                except Exception:
+                    self.stats["errors"] += 1
+            self.stats["render_ms_max"] = max(self.stats["render_ms_max"], (time.perf_counter() - t0) * 1000.0)
+            nxt += self.period
+            wait = nxt - time.monotonic()
+            if wait > 0: time.sleep(wait)
+            else:
+                self.stats["overruns"] += 1
+                nxt = time.monotonic()
+
+def listen(port=WLED_UDP_PORT, host="127.0.0.1"):
+    """Stand-in WLED receiver: prints fps, LED count and protocol per sender every second."""
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    s.bind((host, port))
+    seen, t_last = {}, time.monotonic()
+    while True:
+        pkt, addr = s.recvfrom(2048)
+        proto, start, rgb = decode_packet(pkt)
+        cnt = seen.setdefault(addr, [0, 0, proto])
+        cnt[0] += 1; cnt[1] = max(cnt[1], start + len(rgb) // 3); cnt[2] = proto
+        if time.monotonic() - t_last >= 1.0:
+            for a, (pk, leds, pr) in seen.items():
+                print(f"{a[0]}:{a[1]} proto={pr} packets/s={pk} leds={leds}")
+            seen.clear(); t_last = time.monotonic()
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "--listen":
+        listen(int(sys.argv[2]) if len(sys.argv) > 2 else WLED_UDP_PORT)